@@ -0,0 +1,155 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from typing import List, Optional
+from player import ActionEvent, PlayerAction
+
+_ACTIONS = list(PlayerAction)
+_ACTION_CODES = {action: code for code, action in enumerate(_ACTIONS)}
+
+
+class ActionLog:
+    """
+    Columnar record of every action at a table. Phases, seats and actions are
+    stored as small-int codes in typed arrays, with an index of where each hand
+    starts so that a hand, or the last few hands, can be sliced in O(1).
+
+    Actions are addressed by their sequence number, which counts every action
+    ever appended. With retention_hands set, only the most recent hands are kept
+    and older sequence numbers are silently dropped. The hand in progress is
+    always kept, so a retention of 0 keeps what a retention of 1 does.
+    """
+
+    def __init__(self, phases: List[str], names: List[str], retention_hands: Optional[int] = None):
+        self.phase_names = list(phases)
+        self.phase_codes = {phase: code for code, phase in enumerate(self.phase_names)}
+        self.names = list(names)
+        self.retention_hands = retention_hands
+
+        self.phases = array("B")
+        self.seats = array("B")
+        self.actions = array("B")
+        self.amounts = array("q")
+        # Hand numbers of the retained hands and the sequence number of their first action
+        self.hand_numbers = array("q")
+        self.hand_starts = array("q")
+        self.base = 0  # sequence number of the first retained action
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    @property
+    def end(self) -> int:
+        """Sequence number the next action will get."""
+        return self.base + len(self.actions)
+
+    def append(self, hand_number: int, seat: int, phase: str, action: PlayerAction, amount: int):
+        if not self.hand_numbers or self.hand_numbers[-1] != hand_number:
+            self.hand_numbers.append(hand_number)
+            self.hand_starts.append(self.end)
+            self._trim()
+        self.phases.append(self.phase_codes[phase])
+        self.seats.append(seat)
+        self.actions.append(_ACTION_CODES[action])
+        self.amounts.append(amount)
+
+    def _trim(self):
+        # Trim in chunks so the arrays are only shifted every few hands
+        if self.retention_hands is None:
+            return
+        # Never the hand just started, whatever the retention
+        excess = min(len(self.hand_numbers) - self.retention_hands, len(self.hand_numbers) - 1)
+        if excess < max(1, self.retention_hands // 8):
+            return
+        drop = self.hand_starts[excess] - self.base
+        for column in (self.phases, self.seats, self.actions, self.amounts):
+            del column[:drop]
+        del self.hand_numbers[:excess]
+        del self.hand_starts[:excess]
+        self.base += drop
+
+    def truncate(self, end: int):
+        """Drops the actions numbered end and later, e.g. to rewind to a PokerGame.snapshot()."""
+        keep = max(end - self.base, 0)
+        if keep >= len(self.actions):
+            return
+        for column in (self.phases, self.seats, self.actions, self.amounts):
+            del column[keep:]
+        hands = bisect_left(self.hand_starts, self.base + keep)
+        del self.hand_numbers[hands:]
+        del self.hand_starts[hands:]
+
+    def event(self, seq: int) -> ActionEvent:
+        i = seq - self.base
+        hand = bisect_right(self.hand_starts, seq) - 1
+        return ActionEvent(self.hand_numbers[hand], self.seats[i], self.phase_names[self.phases[i]],
+                           _ACTIONS[self.actions[i]], self.amounts[i])
+
+    def events(self, start: int, stop: Optional[int] = None) -> List[ActionEvent]:
+        """ActionEvents for the sequence numbers in [start, stop), clipped to what is retained."""
+        start = max(start, self.base)
+        stop = self.end if stop is None else min(stop, self.end)
+        if start >= stop:
+            return []
+        hand = bisect_right(self.hand_starts, start) - 1
+        next_hand_start = self.hand_starts[hand + 1] if hand + 1 < len(self.hand_starts) else self.end
+        phase_names = self.phase_names
+        result = []
+        for seq in range(start, stop):
+            while seq >= next_hand_start:
+                hand += 1
+                next_hand_start = self.hand_starts[hand + 1] if hand + 1 < len(self.hand_starts) else self.end
+            i = seq - self.base
+            result.append(ActionEvent(self.hand_numbers[hand], self.seats[i], phase_names[self.phases[i]],
+                                      _ACTIONS[self.actions[i]], self.amounts[i]))
+        return result
+
+    def events_since(self, seq: int) -> List[ActionEvent]:
+        return self.events(seq)
+
+    def hand_range(self, hand_number: int) -> range:
+        """Sequence numbers of the actions in a retained hand, empty if it is not retained."""
+        hand = bisect_right(self.hand_numbers, hand_number) - 1
+        if hand < 0 or self.hand_numbers[hand] != hand_number:
+            return range(0)
+        stop = self.hand_starts[hand + 1] if hand + 1 < len(self.hand_starts) else self.end
+        return range(self.hand_starts[hand], stop)
+
+    def hand(self, hand_number: int) -> List[ActionEvent]:
+        actions = self.hand_range(hand_number)
+        return self.events(actions.start, actions.stop)
+
+    def last_hands(self, count: int) -> List[ActionEvent]:
+        if count <= 0 or not self.hand_starts:
+            return []
+        return self.events(self.hand_starts[max(len(self.hand_starts) - count, 0)])
+
+    def tuples(self) -> "ActionHistoryView":
+        return ActionHistoryView(self)
+
+
+class ActionHistoryView(Sequence):
+    """
+    The retained actions as (phase, player name, action, amount) tuples, the
+    format of PokerGame.action_history. Tuples are built on access.
+    """
+
+    def __init__(self, log: ActionLog):
+        self._log = log
+
+    def __len__(self) -> int:
+        return len(self._log)
+
+    def __getitem__(self, index):
+        log = self._log
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(log)))]
+        if index < 0:
+            index += len(log)
+        if not 0 <= index < len(log):
+            raise IndexError("action history index out of range")
+        return (log.phase_names[log.phases[index]], log.names[log.seats[index]],
+                _ACTIONS[log.actions[index]].value, log.amounts[index])
+
+    def __repr__(self) -> str:
+        return repr(list(self))
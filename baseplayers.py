@@ -1,26 +1,29 @@
 from player import Player, PlayerAction
-from game import PokerGame, GamePhase
-from card import Card
+from game_state import CURRENT_BET
 
 
 class FoldPlayer(Player):
+    __slots__ = ()
 
     def action(self, game_state: list[int], action_history: list):
         return PlayerAction.FOLD, 0
 
 
 class RaisePlayer(Player):
+    __slots__ = ()
 
     def action(self, game_state: list[int], action_history: list):
-        current_raise = game_state[8]
+        current_raise = game_state[CURRENT_BET]
         if self.stack > (current_raise + 40):
             return PlayerAction.RAISE, current_raise + 40
         return PlayerAction.ALL_IN, self.stack
 
 
 class InputPlayer(Player):
+    __slots__ = ()
+
     def action(self, game_state: list[int], action_history: list):
-        call_amount = game_state[8] - self.bet_amount
+        call_amount = game_state[CURRENT_BET] - self.bet_amount
 
         # Display available actions
         print("Available actions:")
@@ -0,0 +1,84 @@
+from typing import Tuple
+import numpy as np
+import hand_evaluator
+from hand_evaluator import HandRank
+
+# Rows processed per step, to bound the size of the temporary key arrays
+_CHUNK_SIZE = 1 << 20
+
+# NumPy copies of the scalar evaluator tables, built on first use
+_CARD_KEYS = None
+_CARD_RANK_BITS = None
+_CARD_SUITS = None
+_RANK_KEYS = None
+_RANK_STRENGTHS = None
+_FLUSH_STRENGTHS = None
+
+
+def _build_arrays():
+    global _CARD_KEYS, _CARD_RANK_BITS, _CARD_SUITS, _RANK_KEYS, _RANK_STRENGTHS, _FLUSH_STRENGTHS
+    _, flush_table = hand_evaluator._lookup_tables()
+    # Already sorted by key, and memory-mapped when the tables came from disk
+    keys, strengths = hand_evaluator._rank_arrays()
+    _RANK_KEYS = np.frombuffer(keys, dtype=np.uint64).astype(np.int64)
+    _RANK_STRENGTHS = np.frombuffer(strengths, dtype=np.uint32).astype(np.int64)
+    _FLUSH_STRENGTHS = np.array(flush_table, dtype=np.int64)
+    _CARD_RANK_BITS = np.array(hand_evaluator._CARD_RANK_BITS, dtype=np.int64)
+    _CARD_SUITS = np.array(hand_evaluator._CARD_SUITS, dtype=np.int64)
+    _CARD_KEYS = np.array(hand_evaluator._CARD_KEYS, dtype=np.int64)
+
+
+def evaluate_batch(cards) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluates many hands at once.
+
+    Parameters:
+        cards: an (N, k) integer array of card indices as returned by Card.get_index(),
+            with 5 <= k <= 7. Indices of 0 (not yet dealt) are ignored, but every row
+            needs at least 5 real cards.
+
+    Returns:
+        An (N,) int64 array of strengths, comparable with each other and identical to
+        HandEvaluator.evaluate_indices, and an (N,) int8 array of HandRank values.
+    """
+    cards = np.asarray(cards)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(f"Expected an (N, 5..7) array of card indices, got shape {cards.shape}")
+    if cards.size and (cards.min() < 0 or cards.max() > 52):
+        raise ValueError("Card indices must be between 0 and 52")
+    short = np.flatnonzero(np.count_nonzero(cards, axis=1) < 5)
+    if short.size:
+        raise ValueError(f"Row {short[0]} has fewer than 5 cards, every hand needs 5 to 7")
+    if _CARD_KEYS is None:
+        _build_arrays()
+
+    cards = cards.astype(np.intp, copy=False)
+    strengths = np.empty(len(cards), dtype=np.int64)
+    for start in range(0, len(cards), _CHUNK_SIZE):
+        chunk = cards[start:start + _CHUNK_SIZE]
+        strengths[start:start + len(chunk)] = _evaluate_chunk(chunk)
+    categories = (strengths >> hand_evaluator._CATEGORY_SHIFT).astype(np.int8)
+    return strengths, categories
+
+
+def hand_ranks(categories: np.ndarray) -> list:
+    """Converts an array of categories returned by evaluate_batch into HandRank members."""
+    return [HandRank(int(category)) for category in categories]
+
+
+def _evaluate_chunk(cards: np.ndarray) -> np.ndarray:
+    totals = _CARD_KEYS[cards].sum(axis=1) + hand_evaluator._FLUSH_BIAS
+    positions = np.searchsorted(_RANK_KEYS, totals & hand_evaluator._RANK_MASK)
+    strengths = _RANK_STRENGTHS[positions]
+
+    flushes = (totals & hand_evaluator._FLUSH_CHECK) >> hand_evaluator._SUIT_SHIFT
+    rows = np.nonzero(flushes)[0]
+    if rows.size:
+        # The flag sits in bit 3 of the suit's nibble: 0x8, 0x80, 0x800 or 0x8000
+        flush = flushes[rows]
+        suits = (flush >= 0x80).astype(np.int64) + (flush >= 0x800) + (flush >= 0x8000)
+        suited = cards[rows]
+        in_suit = _CARD_SUITS[suited] == suits[:, None]
+        masks = (_CARD_RANK_BITS[suited] * in_suit).sum(axis=1)
+        strengths[rows] = _FLUSH_STRENGTHS[masks]
+    return strengths
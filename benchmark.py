@@ -0,0 +1,282 @@
+"""
+Times the hot paths of the engine and the bots with fixed seeds, and optionally
+compares the results with a stored baseline.
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json   # exits with 1 on a regression
+    python benchmark.py --baseline                # against data/benchmark_baseline.json
+
+The committed data/benchmark_baseline.json is a reference run; timings only
+compare on the machine that made them, so regenerate it there before gating on it:
+
+    python benchmark.py --output data/benchmark_baseline.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from array import array
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+from card import Deck, CARDS
+from events import NullSink
+from game import PokerGame
+from game_state import GameStateBuffer, HOLE_CARDS, COMMUNITY_CARDS, CURRENT_BET, BLIND, STACKS
+from hand_evaluator import HandEvaluator
+from my_players import PokerBot
+from player import Player, PlayerAction
+from simulation import play_hand
+
+RESULTS_VERSION = 1
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "benchmark_baseline.json")
+# A benchmark regresses when its p50 is this much slower than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    unit: str  # what one operation is, e.g. "hand"
+    samples: int
+    p50: float  # seconds per operation
+    p99: float
+    mean: float
+
+    @property
+    def throughput(self) -> float:
+        """Operations per second."""
+        return 1 / self.mean if self.mean > 0 else float("inf")
+
+
+def _percentile(sorted_times: List[float], fraction: float) -> float:
+    return sorted_times[min(int(fraction * len(sorted_times)), len(sorted_times) - 1)]
+
+
+def summarize(name: str, unit: str, times: List[float]) -> BenchmarkResult:
+    """Builds a result from per-operation times in seconds."""
+    times = sorted(times)
+    return BenchmarkResult(name, unit, len(times), _percentile(times, 0.5), _percentile(times, 0.99),
+                           sum(times) / len(times))
+
+
+def time_rounds(name: str, unit: str, fn: Callable[[], None], number: int, rounds: int) -> BenchmarkResult:
+    """Calls fn number times per round; every round gives one per-operation time."""
+    fn()  # warm up lazily built tables and caches
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return summarize(name, unit, times)
+
+
+class _CallingPlayer(Player):
+    """Checks or calls every street, so hands reach the showdown without any thinking time."""
+
+    def action(self, game_state, action_history):
+        return PlayerAction.CALL, game_state[CURRENT_BET]
+
+
+def _random_hands(rng: random.Random, count: int, size: int) -> List[List[int]]:
+    return [rng.sample(range(1, 53), size) for _ in range(count)]
+
+
+def bench_evaluator(seed: int, scale: float) -> List[BenchmarkResult]:
+    rng = random.Random(seed)
+    hands = _random_hands(rng, 1000, 7)
+    card_hands = itertools.cycle([[CARDS[index] for index in hand] for hand in hands])
+    index_hands = itertools.cycle(hands)
+
+    def evaluate_hand():
+        hand = next(card_hands)
+        HandEvaluator.evaluate_hand(hand[:2], hand[2:])
+
+    def evaluate_indices():
+        HandEvaluator.evaluate_indices(next(index_hands))
+
+    rounds = max(int(50 * scale), 5)
+    return [time_rounds("evaluator.evaluate_hand", "hand", evaluate_hand, 200, rounds),
+            time_rounds("evaluator.evaluate_indices", "hand", evaluate_indices, 1000, rounds)]
+
+
+def bench_batch_evaluator(seed: int, scale: float) -> List[BenchmarkResult]:
+    try:
+        import numpy as np
+        from batch_evaluator import evaluate_batch
+    except ImportError:
+        print("Skipping batch evaluator benchmark, NumPy is not installed", file=sys.stderr)
+        return []
+    rng = np.random.default_rng(seed)
+    # Random 7 card hands without repeated cards: the first 7 of a shuffled deck per row
+    cards = np.argsort(rng.random((100_000, 52)), axis=1)[:, :7] + 1
+    result = time_rounds("evaluator.evaluate_batch", "batch", lambda: evaluate_batch(cards), 1,
+                         max(int(10 * scale), 3))
+    per_hand = [getattr(result, field) / len(cards) for field in ("p50", "p99", "mean")]
+    return [BenchmarkResult("evaluator.evaluate_batch", "hand", result.samples, *per_hand)]
+
+
+def bench_deck(seed: int, scale: float) -> List[BenchmarkResult]:
+    rng = random.Random(seed)
+    deck = Deck(rng=rng)
+
+    def deal_hand():
+        # Four players and a full board
+        deck.reset()
+        for _ in range(4):
+            deck.deal_indices(2)
+        deck.deal_indices(3)
+        deck.deal_indices(1)
+        deck.deal_indices(1)
+
+    rounds = max(int(50 * scale), 5)
+    return [time_rounds("deck.construct", "deck", lambda: Deck(rng=rng), 1000, rounds),
+            time_rounds("deck.deal_hand", "hand", deal_hand, 1000, rounds)]
+
+
+def bench_game(seed: int, scale: float) -> List[BenchmarkResult]:
+    random.seed(seed)
+    players = [_CallingPlayer(f"Player {i + 1}", 1000) for i in range(4)]
+    game = PokerGame(players, big_blind=20, sink=NullSink(), seed=seed, history_hands=100)
+    game.start_new_hand()
+    state = time_rounds("game.get_game_state", "call", game.get_game_state, 1000, max(int(50 * scale), 5))
+
+    def hand():
+        for player in players:
+            player.stack = 1000
+        play_hand(game)
+
+    hands = time_rounds("game.hands", "hand", hand, 100, max(int(20 * scale), 3))
+    return [state, hands]
+
+
+def _bot_spots(rng: random.Random, count: int, num_board: int, num_players: int = 4) -> List[GameStateBuffer]:
+    spots = []
+    for hand_number in range(count):
+        state = GameStateBuffer(num_players)
+        cards = rng.sample(range(1, 53), 2 + num_board)
+        state.data[HOLE_CARDS:HOLE_CARDS + 2] = array("q", cards[:2])
+        state.data[COMMUNITY_CARDS:COMMUNITY_CARDS + num_board] = array("q", cards[2:])
+        state.data[CURRENT_BET] = rng.choice([0, 20, 60])
+        state.data[BLIND] = 20
+        for seat in range(num_players):
+            state.data[STACKS + seat] = 1000
+        state.data[state.game_number_index] = hand_number + 1
+        spots.append(state)
+    return spots
+
+
+def bench_bot(seed: int, scale: float) -> List[BenchmarkResult]:
+    rng = random.Random(seed)
+    results = []
+    for street, num_board in (("preflop", 0), ("flop", 3), ("turn", 4), ("river", 5)):
+        random.seed(seed)
+        # A new bot starts with an empty equity cache
+        bot = PokerBot("Bot", 1000, verbose=False)
+        times = []
+        for state in _bot_spots(rng, max(int(200 * scale), 20), num_board):
+            start = time.perf_counter()
+            bot.decide_action(state.view, [])
+            times.append(time.perf_counter() - start)
+        results.append(summarize(f"bot.decide_action.{street}", "decision", times))
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[int, float], List[BenchmarkResult]]] = {
+    "evaluator": bench_evaluator,
+    "batch": bench_batch_evaluator,
+    "deck": bench_deck,
+    "game": bench_game,
+    "bot": bench_bot,
+}
+
+
+def run(seed: int = 0, scale: float = 1.0, only: Optional[List[str]] = None) -> List[BenchmarkResult]:
+    results = []
+    for group, bench in BENCHMARKS.items():
+        if only and group not in only:
+            continue
+        results.extend(bench(seed, scale))
+    return results
+
+
+def save_results(path: str, results: List[BenchmarkResult], seed: int):
+    data = {
+        "version": RESULTS_VERSION,
+        "seed": seed,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
+
+
+def load_results(path: str) -> Dict[str, BenchmarkResult]:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} has results version {data.get('version')}, expected {RESULTS_VERSION}")
+    return {name: BenchmarkResult(**fields) for name, fields in data["results"].items()}
+
+
+def compare(results: List[BenchmarkResult], baseline: Dict[str, BenchmarkResult],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Returns the names of the benchmarks whose p50 is more than tolerance slower than the baseline."""
+    return [result.name for result in results
+            if result.name in baseline and result.p50 > baseline[result.name].p50 * (1 + tolerance)]
+
+
+def _format_time(seconds: float) -> str:
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:.0f}ns"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    return f"{seconds * 1e3:.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the number of samples taken")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmark groups to run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE_PATH,
+                        help=f"JSON results to compare against ({DEFAULT_BASELINE_PATH} if no file is given)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed p50 slowdown against the baseline, as a fraction")
+    args = parser.parse_args()
+
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error(f"baseline {args.baseline} does not exist, "
+                     f"create it with: python benchmark.py --output {args.baseline}")
+    baseline = load_results(args.baseline) if args.baseline else {}
+    results = run(args.seed, args.scale, args.only)
+    regressions = compare(results, baseline, args.tolerance)
+
+    print(f"{'benchmark':<32} {'p50':>10} {'p99':>10} {'ops/sec':>12}  baseline p50")
+    for result in results:
+        line = (f"{result.name:<32} {_format_time(result.p50):>10} {_format_time(result.p99):>10} "
+                f"{result.throughput:>12,.0f}")
+        if result.name in baseline:
+            change = result.p50 / baseline[result.name].p50 - 1
+            line += f"  {_format_time(baseline[result.name].p50)} ({change:+.0%})"
+            if result.name in regressions:
+                line += "  REGRESSION"
+        print(line)
+
+    if args.output:
+        save_results(args.output, results, args.seed)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Rebuilds data/preflop_equity.json, the all-in equity of every starting hand
+class against 1-9 random opponents, spreading the work over all cores.
+
+    python build_preflop_table.py --samples 20000
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+from equity import EquityEstimator
+from preflop import TABLE_PATH, TABLE_VERSION, MAX_OPPONENTS, class_cards, hand_classes
+
+
+def compute_entry(name: str, num_opponents: int, samples: int, seed: int) -> Tuple[str, int, float]:
+    estimator = EquityEstimator(max_samples=samples, time_budget=None, target_error=0.0,
+                                rng=random.Random(f"{seed}:{name}:{num_opponents}"))
+    estimate = estimator.estimate(list(class_cards(name)), [], num_opponents)
+    return name, num_opponents, estimate.equity
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=20000, help="Monte Carlo samples per table entry")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=TABLE_PATH)
+    args = parser.parse_args()
+
+    names = hand_classes()
+    jobs = [(name, opponents) for name in names for opponents in range(1, MAX_OPPONENTS + 1)]
+    table = {name: [0.0] * MAX_OPPONENTS for name in names}
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = executor.map(compute_entry, *zip(*jobs), [args.samples] * len(jobs), [args.seed] * len(jobs),
+                               chunksize=16)
+        for name, opponents, equity in results:
+            table[name][opponents - 1] = round(equity, 4)
+    print(f"Computed {len(jobs)} entries in {time.perf_counter() - start:.0f}s")
+
+    write_table(args.output, table, args.samples, args.seed)
+
+
+def write_table(path: str, table: Dict[str, List[float]], samples: int, seed: int):
+    # One line per hand class keeps the file readable and its diffs small
+    rows = ",\n".join(f"  {json.dumps(name)}: {json.dumps(equities)}" for name, equities in table.items())
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(f'{{\n "version": {TABLE_VERSION},\n "samples": {samples},\n "seed": {seed},\n'
+                f' "equity": {{\n{rows}\n }}\n}}\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from enum import Enum
-from typing import List
-from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+from dataclasses import dataclass, field
 import random
 
 
@@ -27,16 +27,27 @@ class Rank(Enum):
     ACE = 14
 
 
-@dataclass
+@dataclass(frozen=True)
 class Card:
     rank: Rank
     suit: Suit
+    index: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "index", (self.suit.value * 13) + self.rank.value - 1)
+
+    @staticmethod
+    def from_index(index: int) -> "Card":
+        """
+        Returns the shared Card instance for an index returned by get_index().
+        """
+        return CARDS[index]
 
     def get_index(self) -> int:
         """
         Returns the index of the card rank. Indexing starts from 1.
         """
-        return (self.suit.value * 13) + self.rank.value - 1
+        return self.index
     
     def __str__(self) -> str:
         rank_symbols = {
@@ -50,16 +61,112 @@ class Card:
         return f"{rank_symbols[self.rank]}{suit_symbols[self.suit]}"
 
 
+# One interned Card per index, so CARDS[card.get_index()] is card. Index 0 is unused.
+CARDS: List[Card] = [None] + [Card(rank, suit) for suit in Suit for rank in Rank]
+
+# 64-bit card sets: card index i is stored in bit i - 1, so every suit occupies
+# a contiguous 13-bit block ordered from deuce to ace.
+CARD_MASKS = [0] + [1 << i for i in range(52)]
+SUIT_MASKS = [0x1FFF << (13 * suit.value) for suit in Suit]
+RANK_MASKS = {rank: sum(CARD_MASKS[Card(rank, suit).index] for suit in Suit) for rank in Rank}
+FULL_DECK_MASK = (1 << 52) - 1
+
+
+def indices_to_mask(indices: Iterable[int]) -> int:
+    mask = 0
+    for index in indices:
+        mask |= CARD_MASKS[index]
+    return mask
+
+
+def cards_to_mask(cards: Iterable[Card]) -> int:
+    return indices_to_mask(card.index for card in cards)
+
+
+def mask_to_indices(mask: int) -> Iterator[int]:
+    """
+    Yields the card indices in a card set, lowest first.
+    """
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length()
+        mask ^= lowest
+
+
+def mask_to_cards(mask: int) -> List[Card]:
+    return [CARDS[index] for index in mask_to_indices(mask)]
+
+
 class Deck:
-    def __init__(self):
-        self.cards = [Card(rank, suit) for rank in Rank for suit in Suit]
-        self.shuffle()
-    
+    """
+    A deck of card indices that is shuffled lazily: each deal draws the next
+    cards with a partial Fisher-Yates step, so a hand only pays for the cards it
+    uses. Pass an rng (random.Random) or a seed for a reproducible stream;
+    otherwise the module level random generator is used.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None, seed: Optional[int] = None):
+        if rng is None:
+            rng = random.Random(seed) if seed is not None else random
+        self.rng = rng
+        # Dealt cards are swapped to the front, cards from num_dealt onwards are still in the deck
+        self.indices = list(range(1, 53))
+        self.num_dealt = 0
+        # Cards every hand deals first, in this order, see preset()
+        self.preset_order: List[int] = []
+
+    def __len__(self) -> int:
+        return 52 - self.num_dealt
+
+    @property
+    def cards(self) -> List[Card]:
+        """
+        The cards still in the deck, in no particular order.
+        """
+        return [CARDS[index] for index in self.indices[self.num_dealt:]]
+
+    def reset(self):
+        """
+        Puts every card back into the deck without reallocating it.
+        """
+        self.num_dealt = 0
+        indices = self.indices
+        for k, index in enumerate(self.preset_order):
+            j = indices.index(index, k)
+            indices[k], indices[j] = indices[j], indices[k]
+
+    def preset(self, order: Iterable[int]):
+        """
+        Makes every hand from now on deal these card indices first, in order, and
+        random cards after them. Used to replay or duplicate deals; preset([])
+        goes back to a fully random deck. Puts every card back into the deck.
+        """
+        order = list(order)
+        if len(set(order)) != len(order) or not all(1 <= index <= 52 for index in order):
+            raise ValueError(f"Invalid preset card order: {order}")
+        self.preset_order = order
+        self.reset()
+
     def shuffle(self):
-        random.shuffle(self.cards)
-    
+        # Shuffling happens while dealing, so collecting the cards is enough
+        self.reset()
+
+    def deal_indices(self, num_cards: int = 1) -> List[int]:
+        """
+        Deals num_cards card indices from the deck, and discards them.
+        """
+        indices = self.indices
+        draw = self.rng.random
+        start = self.num_dealt
+        end = min(start + num_cards, 52)
+        for k in range(max(start, len(self.preset_order)), end):
+            j = k + int(draw() * (52 - k))
+            indices[k], indices[j] = indices[j], indices[k]
+        self.num_dealt = end
+        return indices[start:end]
+
     def deal(self, num_cards: int = 1) -> List[Card]:
         """
         Deals num_cards cards from the deck, and discards them.
         """
-        return [self.cards.pop() for _ in range(min(num_cards, len(self.cards)))]
+        return [CARDS[index] for index in self.deal_indices(num_cards)]
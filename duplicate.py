@@ -0,0 +1,178 @@
+"""
+Duplicate matches: every deal is played once per seat rotation, so each bot
+plays every set of cards from every seat and the luck of the cards cancels out
+of the comparison.
+
+A deal fixes the hole cards of every seat and the board. The match keeps one
+table per rotation, with bot i at seat (i + r) % n at table r, and plays each
+deal at every table with the same button and the same seed for the global
+random generator, so bots that draw from it see common random numbers too.
+A bot's result for a deal is its net over all the rotations, and win rates and
+their differences are estimated from those per-deal results.
+
+    python duplicate.py pokerbot raise --deals 2000
+"""
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from events import NullSink
+from game import PokerGame
+from registry import bot_label, load_bot
+from simulation import play_hand
+from tournament import BLOCK_HISTORY_HANDS, BotEntry, block_seeds
+
+
+def deal_order(rng: random.Random, num_seats: int) -> List[int]:
+    """The card indices of one deal in dealing order: two hole cards per seat, then the board."""
+    return rng.sample(range(1, 53), 2 * num_seats + 5)
+
+
+def rotations(bots: List[BotEntry]) -> List[List[BotEntry]]:
+    """The seatings of a duplicate match: at table r, bot i sits at seat (i + r) % n."""
+    n = len(bots)
+    return [[bots[(seat - r) % n] for seat in range(n)] for r in range(n)]
+
+
+def play_duplicate_block(bots: List[BotEntry], seed: int, num_deals: int, big_blind: int,
+                         stack: int) -> Dict[str, List[int]]:
+    """
+    Plays num_deals deals at every rotation, resetting every stack before each
+    hand. Returns every bot's net chips per deal, summed over the rotations.
+    Runs inside the worker processes, which own their game and player instances.
+    """
+    rng = random.Random(seed)
+    tables = []
+    for seating in rotations(bots):
+        players = [factory(name, stack) for name, factory in seating]
+        tables.append(PokerGame(players, big_blind=big_blind, sink=NullSink(), seed=seed,
+                                history_hands=BLOCK_HISTORY_HANDS))
+    results = {name: [] for name, _ in bots}
+    for _ in range(num_deals):
+        order = deal_order(rng, len(bots))
+        bot_seed = rng.getrandbits(64)
+        totals = dict.fromkeys(results, 0)
+        for game in tables:
+            for player in game.players:
+                player.stack = stack
+            game.deck.preset(order)
+            random.seed(bot_seed)
+            play_hand(game)
+            for player in game.players:
+                totals[player.name] += player.stack - stack
+        for name, total in totals.items():
+            results[name].append(total)
+    return results
+
+
+def _mean_and_error(values: List[float]) -> Tuple[float, float]:
+    """Mean and its standard error."""
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, float("inf")
+    variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+    return mean, math.sqrt(variance / n)
+
+
+@dataclass
+class DuplicateResult:
+    deals: int
+    seats: int
+    seconds: float
+    big_blind: int
+    deal_results: Dict[str, List[int]]  # net chips per deal, summed over the rotations
+
+    @property
+    def hands(self) -> int:
+        return self.deals * self.seats
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.seconds if self.seconds > 0 else float("inf")
+
+    def _per_100(self, values: List[float]) -> Tuple[float, float]:
+        # A deal is self.seats hands
+        mean, error = _mean_and_error(values)
+        scale = 100 / (self.seats * self.big_blind)
+        return mean * scale, error * scale
+
+    def bb_per_100(self, name: str) -> Tuple[float, float]:
+        """Win rate of a bot in big blinds per 100 hands, and its standard error."""
+        return self._per_100(self.deal_results[name])
+
+    def difference(self, name: str, other: str) -> Tuple[float, float]:
+        """
+        Paired difference of two bots' win rates in big blinds per 100 hands, and
+        its standard error, from their results on the same deals.
+        """
+        return self._per_100([a - b for a, b in zip(self.deal_results[name], self.deal_results[other])])
+
+    def summary(self, z: float = 1.96) -> str:
+        lines = [f"{self.deals} deals x {self.seats} rotations = {self.hands} hands, {self.seconds:.2f}s "
+                 f"({self.hands_per_second:.0f} hands/sec)"]
+        names = list(self.deal_results)
+        for name in names:
+            rate, error = self.bb_per_100(name)
+            lines.append(f"{name:>16}: {rate:+8.2f} ± {z * error:.2f} bb/100, net {sum(self.deal_results[name]):+d}")
+        for i, name in enumerate(names):
+            for other in names[i + 1:]:
+                rate, error = self.difference(name, other)
+                lines.append(f"{name:>16} - {other}: {rate:+8.2f} ± {z * error:.2f} bb/100")
+        return "\n".join(lines)
+
+
+def run_duplicate(bots: List[BotEntry], num_deals: int, deals_per_block: int = 250, workers: Optional[int] = None,
+                  seed: int = 0, big_blind: int = 20, stack: int = 1000) -> DuplicateResult:
+    """
+    Splits num_deals into seeded blocks and plays them across a process pool,
+    as run_tournament does. Every deal is played len(bots) times.
+    """
+    names = [name for name, _ in bots]
+    if len(set(names)) != len(names):
+        raise ValueError("Bot names must be unique")
+
+    block_sizes = [deals_per_block] * (num_deals // deals_per_block)
+    if num_deals % deals_per_block:
+        block_sizes.append(num_deals % deals_per_block)
+    seeds = block_seeds(seed, len(block_sizes))
+    play = partial(play_duplicate_block, bots, big_blind=big_blind, stack=stack)
+
+    start = time.perf_counter()
+    if workers == 1:
+        block_results = list(map(play, seeds, block_sizes))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            block_results = list(executor.map(play, seeds, block_sizes))
+    seconds = time.perf_counter() - start
+
+    deal_results = {name: [] for name in names}
+    for block in block_results:
+        for name, results in block.items():
+            deal_results[name].extend(results)
+    return DuplicateResult(num_deals, len(bots), seconds, big_blind, deal_results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("bots", nargs="+", help="bots to seat, as a registered name or module:Class")
+    parser.add_argument("--deals", type=int, default=2000)
+    parser.add_argument("--block", type=int, default=250, help="deals per worker task")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stack", type=int, default=1000)
+    parser.add_argument("--big-blind", type=int, default=20)
+    args = parser.parse_args()
+
+    bots = [(f"{bot_label(spec)} {i + 1}", load_bot(spec)) for i, spec in enumerate(args.bots)]
+    result = run_duplicate(bots, args.deals, deals_per_block=args.block, workers=args.workers,
+                           seed=args.seed, big_blind=args.big_blind, stack=args.stack)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
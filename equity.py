@@ -0,0 +1,153 @@
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+import hand_evaluator
+from hand_evaluator import HandEvaluator
+
+# How often (in samples) the stopping rules are checked
+_CHECK_INTERVAL = 64
+
+
+@dataclass
+class EquityEstimate:
+    equity: float  # expected share of the pot, ties split evenly
+    error: float  # half-width of the confidence interval around equity
+    samples: int
+
+    def __str__(self) -> str:
+        return f"{self.equity:.3f} ± {self.error:.3f} ({self.samples} samples)"
+
+
+class EquityEstimator:
+    """
+    Monte Carlo all-in equity of a hand against random opponent hands.
+
+    Each sample deals the opponents' hole cards and the rest of the board from
+    the unseen cards with a partial Fisher-Yates shuffle. The list of unseen
+    cards is built per call, so one estimator can serve several threads.
+    Sampling stops at max_samples, when time_budget seconds have passed, or once
+    the confidence interval is narrower than target_error on each side,
+    whichever comes first.
+
+    Cards are drawn from rng, the module level random generator by default, so
+    seeding that generator (as the tournament blocks do) reproduces the
+    estimates. A time budget makes the number of samples, and so the estimate,
+    depend on the machine: pass time_budget=None for reproducible results.
+    """
+
+    def __init__(self, max_samples: int = 1000, time_budget: Optional[float] = 0.005, target_error: float = 0.03,
+                 min_samples: int = 200, z: float = 1.96, rng: Optional[random.Random] = None):
+        self.max_samples = max_samples
+        self.time_budget = time_budget
+        self.target_error = target_error
+        self.min_samples = min_samples
+        self.z = z
+        self.rng = rng if rng is not None else random
+
+    def estimate(self, hole_cards: List[int], community_cards: List[int], num_opponents: int = 1) -> EquityEstimate:
+        """
+        Parameters:
+            hole_cards: the two hole card indices, as returned by Card.get_index()
+            community_cards: the board card indices dealt so far (0 entries are ignored)
+            num_opponents: number of opponents still in the hand
+
+        Returns:
+            An EquityEstimate
+        """
+        hole_cards = [card for card in hole_cards if card]
+        board = [card for card in community_cards if card]
+        if len(hole_cards) != 2 or len(board) > 5:
+            raise ValueError("Expected two hole cards and at most five community cards")
+        num_opponents = max(1, num_opponents)
+        board_needed = 5 - len(board)
+        needed = board_needed + 2 * num_opponents
+
+        known = set(hole_cards + board)
+        unseen = [card for card in range(1, 53) if card not in known]
+        size = len(unseen)
+        if needed > size:
+            raise ValueError("Not enough cards left for that many opponents")
+
+        keys = hand_evaluator._CARD_KEYS
+        rank_table, _ = hand_evaluator._lookup_tables()
+        rank_mask = hand_evaluator._RANK_MASK
+        flush_check = hand_evaluator._FLUSH_CHECK
+        evaluate = HandEvaluator.evaluate_indices
+        draw = self.rng.random
+
+        known_board_total = hand_evaluator._FLUSH_BIAS + sum(keys[card] for card in board)
+        hole_total = keys[hole_cards[0]] + keys[hole_cards[1]]
+        opponent_range = range(board_needed, needed, 2)
+
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        samples = 0
+        total = 0.0
+        total_squared = 0.0
+        while samples < self.max_samples:
+            for k in range(needed):
+                j = k + int(draw() * (size - k))
+                unseen[k], unseen[j] = unseen[j], unseen[k]
+
+            board_total = known_board_total
+            for k in range(board_needed):
+                board_total += keys[unseen[k]]
+            full_board = None
+
+            hero_total = board_total + hole_total
+            if hero_total & flush_check:
+                full_board = board + unseen[:board_needed]
+                hero = evaluate(hole_cards + full_board)
+            else:
+                hero = rank_table[hero_total & rank_mask]
+
+            best = 0
+            tied = 0
+            for k in opponent_range:
+                first, second = unseen[k], unseen[k + 1]
+                opponent_total = board_total + keys[first] + keys[second]
+                if opponent_total & flush_check:
+                    if full_board is None:
+                        full_board = board + unseen[:board_needed]
+                    strength = evaluate([first, second] + full_board)
+                else:
+                    strength = rank_table[opponent_total & rank_mask]
+                if strength > best:
+                    best = strength
+                    tied = 0
+                if strength == best:
+                    tied += 1
+
+            if hero > best:
+                result = 1.0
+            elif hero == best:
+                result = 1.0 / (tied + 1)
+            else:
+                result = 0.0
+            samples += 1
+            total += result
+            total_squared += result * result
+
+            if samples % _CHECK_INTERVAL == 0:
+                if samples >= self.min_samples and self._error(samples, total, total_squared) <= self.target_error:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+
+        return EquityEstimate(total / samples, self._error(samples, total, total_squared), samples)
+
+    def _error(self, samples: int, total: float, total_squared: float) -> float:
+        if samples < 2:
+            return 1.0
+        mean = total / samples
+        variance = max(total_squared / samples - mean * mean, 0.0) * samples / (samples - 1)
+        return self.z * math.sqrt(variance / samples)
+
+
+def estimate_equity(hole_cards: List[int], community_cards: List[int], num_opponents: int = 1,
+                    **estimator_options) -> EquityEstimate:
+    """
+    One-off equity estimate, see EquityEstimator for the available options.
+    """
+    return EquityEstimator(**estimator_options).estimate(hole_cards, community_cards, num_opponents)
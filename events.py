@@ -0,0 +1,130 @@
+import json
+import sys
+from collections import deque
+from typing import IO, Optional
+from card import CARDS
+from player import PlayerAction
+
+
+class EventSink:
+    """
+    Receives the events a PokerGame emits instead of printing them.
+
+    Every event has a kind and a set of plain (JSON serialisable) fields. Cards
+    are given as indices, as returned by Card.get_index().
+
+    Event kinds:
+        new_hand        game_number, button
+        blind           seat, player, amount
+        decision        seat, player, action, amount  (what the player asked for)
+        invalid_action  seat, player, message
+        action          seat, player, phase, action, requested, amount
+        state           phase, pot, board, button, active_player, players
+        showdown        (no fields)
+        hand_shown      seat, player, cards, hand_rank
+        win             seat, player, amount, hand_rank  (hand_rank is None when uncontested)
+    """
+    # The game skips building events altogether when this is False
+    enabled = True
+
+    def emit(self, kind: str, **fields):
+        raise NotImplementedError
+
+
+class NullSink(EventSink):
+    """Discards everything. Use it to run the engine headless."""
+    enabled = False
+
+    def emit(self, kind: str, **fields):
+        pass
+
+
+class ConsoleSink(EventSink):
+    """Prints events as human readable text. This is the default sink of PokerGame."""
+
+    def __init__(self, stream: Optional[IO] = None):
+        self.stream = stream
+
+    def emit(self, kind: str, **fields):
+        text = format_event(kind, fields)
+        if text is not None:
+            print(text, file=self.stream or sys.stdout)
+
+
+class BufferedSink(EventSink):
+    """Keeps (kind, fields) pairs in memory, optionally only the most recent maxlen of them."""
+
+    def __init__(self, maxlen: Optional[int] = None):
+        self.events = deque(maxlen=maxlen)
+
+    def emit(self, kind: str, **fields):
+        self.events.append((kind, fields))
+
+    def clear(self):
+        self.events.clear()
+
+
+class JsonLinesSink(EventSink):
+    """Writes one JSON object per event, with the kind stored under "event"."""
+
+    def __init__(self, stream: IO):
+        self.stream = stream
+
+    def emit(self, kind: str, **fields):
+        self.stream.write(json.dumps({"event": kind, **fields}) + "\n")
+
+
+class TeeSink(EventSink):
+    """Forwards every event to several sinks."""
+
+    def __init__(self, *sinks: EventSink):
+        self.sinks = [sink for sink in sinks if sink.enabled]
+        self.enabled = bool(self.sinks)
+
+    def emit(self, kind: str, **fields):
+        for sink in self.sinks:
+            sink.emit(kind, **fields)
+
+
+def _cards(indices) -> list:
+    return [str(CARDS[index]) for index in indices if index]
+
+
+def format_event(kind: str, fields: dict) -> Optional[str]:
+    """
+    Renders an event the way the engine has always printed it, or returns None
+    for events that have no console output.
+    """
+    if kind == "new_hand":
+        return "\n====== NEW HAND ======"
+    if kind == "blind":
+        return f"{fields['player']} posts big blind: {fields['amount']}"
+    if kind == "decision":
+        return str((PlayerAction(fields["action"]), fields["amount"]))
+    if kind == "invalid_action":
+        return fields["message"]
+    if kind == "action":
+        text = f"{fields['player']} {fields['action']}s"
+        if fields["requested"] in (PlayerAction.BET.value, PlayerAction.RAISE.value, PlayerAction.CALL.value):
+            text += f" {fields['amount']}"
+        return text
+    if kind == "state":
+        lines = [f"\nPhase: {fields['phase']}", f"Pot: {fields['pot']}"]
+        if any(fields["board"]):
+            lines.append(f"Community cards: {_cards(fields['board'])}")
+        lines.append("\nPlayers:")
+        for i, player in enumerate(fields["players"]):
+            position = "(BTN)" if i == fields["button"] else ""
+            cards = {"folded": "folded", "out": "out"}.get(player["status"], "[hidden]")
+            active = "→ " if i == fields["active_player"] and player["status"] == "active" else "  "
+            lines.append(f"{active}{player['name']} {position}: ${player['stack']} {cards} {player['status']}")
+        return "\n".join(lines)
+    if kind == "showdown":
+        return "\n=== SHOWDOWN ==="
+    if kind == "hand_shown":
+        return f"{fields['player']}: {_cards(fields['cards'])} - {fields['hand_rank']}"
+    if kind == "win":
+        if fields["hand_rank"] is None:
+            return f"{fields['player']} wins {fields['amount']} chips"
+        return f"{fields['player']} wins {fields['amount']} chips with {fields['hand_rank']}"
+    return None
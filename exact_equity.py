@@ -0,0 +1,109 @@
+from itertools import combinations
+from typing import Iterable, List, Optional, Tuple
+import hand_evaluator
+from card import CARD_MASKS, indices_to_mask
+from equity import EquityEstimate
+from hand_evaluator import HandEvaluator
+
+# An opponent holding: two card indices and a weight
+Combo = Tuple[int, int, float]
+
+
+def all_combos(dead_mask: int = 0) -> List[Combo]:
+    """Every two card holding, with weight 1, that uses none of the cards in dead_mask."""
+    live = [index for index in range(1, 53) if not dead_mask & CARD_MASKS[index]]
+    return [(card1, card2, 1.0) for card1, card2 in combinations(live, 2)]
+
+
+def exact_equity(hole_cards: List[int], community_cards: List[int],
+                 opponent_combos: Optional[Iterable[Combo]] = None, dead_cards: Iterable[int] = ()) -> EquityEstimate:
+    """
+    All-in equity of hole_cards against one opponent holding one of
+    opponent_combos (every possible holding by default), enumerating every
+    runout of the board exactly. Combos that share a card with the hand or the
+    board are dropped, and combos sharing a card with a runout are skipped for
+    that runout, so the weights are conditioned on the cards actually seen.
+
+    The board and each holding are summed into a partial evaluator key once;
+    every runout then only adds its one or two cards. Against every holding a
+    river spot takes about a millisecond, a turn spot about 10.
+
+    Parameters:
+        hole_cards: the two hole card indices, as returned by Card.get_index()
+        community_cards: the board card indices dealt so far (0 entries are ignored),
+            at least three (a flop spot takes about a quarter of a second)
+        opponent_combos: (card1, card2, weight) holdings of the opponent
+        dead_cards: card indices known to be out of play (folded or burnt), which
+            neither the runouts nor the opponent can hold
+
+    Returns:
+        An EquityEstimate with an error of 0, samples is the number of hands compared
+    """
+    hole_cards = [card for card in hole_cards if card]
+    board = [card for card in community_cards if card]
+    if len(hole_cards) != 2 or not 3 <= len(board) <= 5:
+        raise ValueError("Expected two hole cards and three to five community cards")
+
+    rank_table, flush_table = hand_evaluator._lookup_tables()
+    card_keys = hand_evaluator._CARD_KEYS
+    rank_mask = hand_evaluator._RANK_MASK
+    flush_check = hand_evaluator._FLUSH_CHECK
+    suit_shift = hand_evaluator._SUIT_SHIFT + 4
+
+    board_key, board_mask = HandEvaluator.partial_key(board)
+    hole_mask = CARD_MASKS[hole_cards[0]] | CARD_MASKS[hole_cards[1]]
+    hero_key = board_key + card_keys[hole_cards[0]] + card_keys[hole_cards[1]]
+    hero_mask = board_mask | hole_mask
+    # Cards no runout or opponent can hold; only the hero's own cards score with the hero
+    dead_mask = hero_mask | indices_to_mask(card for card in dead_cards if card)
+
+    # Every runout with its key, mask and the hero's strength on it
+    live = [index for index in range(1, 53) if not dead_mask & CARD_MASKS[index]]
+    runouts = []
+    for cards in combinations(live, 5 - len(board)):
+        key = 0
+        mask = 0
+        for card in cards:
+            key += card_keys[card]
+            mask |= CARD_MASKS[card]
+        hero = HandEvaluator.evaluate_key(hero_key + key, hero_mask | mask)
+        runouts.append((key, mask, hero))
+
+    if opponent_combos is None:
+        opponent_combos = all_combos(dead_mask)
+
+    won = 0.0
+    total = 0.0
+    compared = 0
+    for card1, card2, weight in opponent_combos:
+        combo_mask = CARD_MASKS[card1] | CARD_MASKS[card2]
+        if combo_mask & dead_mask or card1 == card2 or weight <= 0:
+            continue
+        opponent_key = board_key + card_keys[card1] + card_keys[card2]
+        opponent_mask = board_mask | combo_mask
+        wins = 0
+        ties = 0
+        count = 0
+        for key, mask, hero in runouts:
+            if mask & combo_mask:
+                continue
+            total_key = opponent_key + key
+            flush = total_key & flush_check
+            if flush:
+                suit = (flush.bit_length() - suit_shift) >> 2
+                opponent = flush_table[((opponent_mask | mask) >> (13 * suit)) & 0x1FFF]
+            else:
+                opponent = rank_table[total_key & rank_mask]
+            if hero > opponent:
+                wins += 1
+            elif hero == opponent:
+                ties += 1
+            count += 1
+        if count:
+            won += weight * (wins + 0.5 * ties) / count
+            total += weight
+            compared += count
+
+    if total == 0:
+        raise ValueError("No opponent holding is possible with these cards")
+    return EquityEstimate(won / total, 0.0, compared)
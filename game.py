@@ -1,9 +1,16 @@
+import random
+import threading
+import time
 from enum import Enum
-from typing import List
-from card import Card, Deck
+from typing import List, NamedTuple, Optional, Tuple
+from card import Card, Deck, CARDS
 from player import Player, PlayerAction, PlayerStatus
 from hand_evaluator import HandEvaluator
-from my_players import PokerBot
+from events import EventSink, ConsoleSink, NullSink
+from action_log import ActionLog
+from runners import BotRunner, InlineRunner
+from game_state import (GameStateBuffer, GameStateView, HOLE_CARDS, COMMUNITY_CARDS, POT, CURRENT_BET,
+                        BLIND, ACTIVE_PLAYER, STACKS)
 
 
 class GamePhase(Enum):
@@ -15,27 +22,89 @@ class GamePhase(Enum):
     SHOWDOWN = "showdown"
 
 
+class GameSnapshot(NamedTuple):
+    """
+    Everything PokerGame.restore() needs to carry on a hand from a point in it,
+    as immutable tuples of ints and enums. Per-seat tuples are indexed by seat;
+    card fields hold card indices, 0 while not dealt.
+    """
+    phase: GamePhase
+    button: int
+    active: int  # seat to act
+    pot: int
+    current_bet: int
+    big_blind: int
+    game_number: int
+    board: Tuple[int, ...]
+    holes: Tuple[Tuple[int, int], ...]
+    stacks: Tuple[int, ...]
+    bets: Tuple[int, ...]
+    statuses: Tuple[PlayerStatus, ...]
+    has_played: Tuple[bool, ...]
+    deck: Tuple[int, ...]  # Deck.indices, dealt cards first
+    dealt: int
+    log_end: int  # action log sequence number of the next action, -1 if the state is in no log (see apply)
+
+
+# Players whose bet must match the current bet before a betting round can end.
+# OUT players count too: they hold no chips and never act.
+_MATCHING = (PlayerStatus.ACTIVE, PlayerStatus.OUT)
+_STATUSES = tuple(PlayerStatus)
+
+
 class PokerGame:
-    def __init__(self, players: List[PokerBot], big_blind: int, game_number: int = 0):
+    def __init__(self, players: List[Player], big_blind: int, game_number: int = 0,
+                 sink: EventSink = None, rng: Optional[random.Random] = None, seed: Optional[int] = None,
+                 history_hands: Optional[int] = None, recorder=None, runner: Optional[BotRunner] = None):
         self.players = players
+        # Backs pot, current_bet, big_blind, active_player_index and game_number, see get_game_state
+        self.state = GameStateBuffer(len(players))
+        # Where game events go. Pass events.NullSink() to run headless.
+        self.sink = sink if sink is not None else ConsoleSink()
         self.big_blind = big_blind
-        self.deck = None
+        # One deck per game, reset in place for every hand. rng/seed make the deals reproducible.
+        self.deck = Deck(rng=rng, seed=seed)
         self.community_cards = []
+        # Card indices, 0 while not dealt. Card objects are only built for players and display.
+        self.board_indices = [0] * 5
+        self.hole_indices = [[0, 0] for _ in self.players]
         self.pot = 0
         self.current_bet = 0  # how much has been raised (includes big blind)
         self.phase = GamePhase.SETUP
         self.button_position = 0
         self.active_player_index = 0
         self.has_played = [False] * len(self.players)
-        self.action_history = []
+        # Kept up to date on every status or bet change (see _track) and rebuilt once
+        # per hand, so no per-action check scans the table: players per status,
+        # matching players (see _MATCHING) per bet amount, seats that have not
+        # acted this round, and a next-to-act ring in which a seat that is no
+        # longer active points further round the table (see _next_active)
+        self.status_counts = dict.fromkeys(_STATUSES, 0)
+        self._bet_counts = {}
+        self._num_unplayed = 0
+        self._ring = list(range(len(self.players)))
+        # Every action, keeping the last history_hands hands (all of them if None).
+        # action_history is the same data as (phase, name, action, amount) tuples.
+        self.action_log = ActionLog([phase.value for phase in GamePhase], [p.name for p in players],
+                                    retention_hands=history_hands)
+        self.action_history = self.action_log.tuples()
+        # Sequence number of the next action each seat has not been fed yet
+        self.feed_cursors = [0] * len(self.players)
         self.game_number = game_number
+        # Optional hand_history.HandHistoryWriter, told about every deal, action and payout
+        self.recorder = recorder
+        # Set by instrumentation.Instruments.attach() to time the players' decisions
+        self.instruments = None
+        # How player.action is called, e.g. runners.ThreadRunner to enforce a deadline
+        self.runner = runner if runner is not None else InlineRunner()
 
     def start_new_hand(self):
-        print("\n====== NEW HAND ======")
         # Reset game state
         self.game_number += 1
-        self.deck = Deck()
+        self.deck.reset()
         self.community_cards = []
+        self.board_indices = [0] * 5
+        self.state.clear_cards()
         self.pot = 0
         self.current_bet = 0
         self.phase = GamePhase.SETUP
@@ -44,12 +113,18 @@ class PokerGame:
         for i, player in enumerate(self.players):
             player.reset_for_new_hand()
             self.has_played[i] = False if player.status == PlayerStatus.ACTIVE else True
+            self._sync_stack(i)
+        self._recount()
 
         # Move button to next player_hand
         self.button_position = (self.button_position + 1) % len(self.players)
+        if self.sink.enabled:
+            self.sink.emit("new_hand", game_number=self.game_number, button=self.button_position)
 
         # Deal cards
         self._deal_hole_cards()
+        if self.recorder is not None:
+            self.recorder.start_hand(self)
 
         # Post blinds
         self._post_blinds()
@@ -63,9 +138,64 @@ class PokerGame:
         self.display_game_state()
 
     def _deal_hole_cards(self):
-        for player in self.players:
+        for i, player in enumerate(self.players):
             if player.status != PlayerStatus.OUT:
-                player.hole_cards = self.deck.deal(2)
+                self.hole_indices[i] = self.deck.deal_indices(2)
+                player.hole_cards = [CARDS[index] for index in self.hole_indices[i]]
+            else:
+                self.hole_indices[i] = [0, 0]
+
+    def _deal_community_cards(self, num_cards: int):
+        indices = self.deck.deal_indices(num_cards)
+        for index in indices:
+            self.board_indices[len(self.community_cards)] = index
+            self.state.data[COMMUNITY_CARDS + len(self.community_cards)] = index
+            self.community_cards.append(CARDS[index])
+        if self.recorder is not None:
+            self.recorder.deal(self.phase, indices)
+
+    def _sync_stack(self, seat: int):
+        self.state.data[STACKS + seat] = self.players[seat].stack
+
+    @property
+    def pot(self) -> int:
+        return self.state.data[POT]
+
+    @pot.setter
+    def pot(self, value: int):
+        self.state.data[POT] = value
+
+    @property
+    def current_bet(self) -> int:
+        return self.state.data[CURRENT_BET]
+
+    @current_bet.setter
+    def current_bet(self, value: int):
+        self.state.data[CURRENT_BET] = value
+
+    @property
+    def big_blind(self) -> int:
+        return self.state.data[BLIND]
+
+    @big_blind.setter
+    def big_blind(self, value: int):
+        self.state.data[BLIND] = value
+
+    @property
+    def active_player_index(self) -> int:
+        return self.state.data[ACTIVE_PLAYER]
+
+    @active_player_index.setter
+    def active_player_index(self, value: int):
+        self.state.data[ACTIVE_PLAYER] = value
+
+    @property
+    def game_number(self) -> int:
+        return self.state.data[self.state.game_number_index]
+
+    @game_number.setter
+    def game_number(self, value: int):
+        self.state.data[self.state.game_number_index] = value
 
     def _post_blinds(self):
         # Big blind only, no small blind
@@ -73,34 +203,84 @@ class PokerGame:
         bb_player = self.players[bb_position]
 
         if bb_player.stack > 0:
+            status, bet = bb_player.status, bb_player.bet_amount
             action, amount = bb_player.take_action(PlayerAction.BET, self.big_blind)
+            self._track(bb_position, status, bet)
+            self._sync_stack(bb_position)
             self.pot += amount
             self.current_bet = self.big_blind
-            print(f"{bb_player.name} posts big blind: {amount}")
+            if self.sink.enabled:
+                self.sink.emit("blind", seat=bb_position, player=bb_player.name, amount=amount)
+            if self.recorder is not None:
+                self.recorder.blind(bb_position, amount)
+
+    def _recount(self):
+        """Rebuilds the incrementally kept counts and the next-to-act ring from the players."""
+        num_players = len(self.players)
+        counts = dict.fromkeys(_STATUSES, 0)
+        bet_counts = {}
+        ring = self._ring
+        active = PlayerStatus.ACTIVE
+        for seat, player in enumerate(self.players):
+            status = player.status
+            counts[status] += 1
+            if status in _MATCHING:
+                bet_counts[player.bet_amount] = bet_counts.get(player.bet_amount, 0) + 1
+            ring[seat] = seat if status is active else (seat + 1) % num_players
+        self.status_counts = counts
+        self._bet_counts = bet_counts
+        self._num_unplayed = self.has_played.count(False)
+
+    def _track(self, seat: int, old_status: PlayerStatus, old_bet: int):
+        """Updates the counts and the ring after the player at seat changed from old_status and old_bet."""
+        player = self.players[seat]
+        status = player.status
+        bet_counts = self._bet_counts
+        if old_status in _MATCHING:
+            bet_counts[old_bet] -= 1
+        if status in _MATCHING:
+            bet_counts[player.bet_amount] = bet_counts.get(player.bet_amount, 0) + 1
+        if status is not old_status:
+            self.status_counts[old_status] -= 1
+            self.status_counts[status] += 1
+            if old_status is PlayerStatus.ACTIVE:
+                self._ring[seat] = (seat + 1) % len(self.players)
+
+    def _next_active(self, seat: int) -> Optional[int]:
+        """The first active seat at or after seat, going round the table, or None if nobody is active."""
+        if not self.status_counts[PlayerStatus.ACTIVE]:
+            return None
+        # Every seat that left play points at a later seat with nobody active in
+        # between; following the pointers while halving the path keeps lookups
+        # amortized constant
+        ring = self._ring
+        while ring[seat] != seat:
+            ring[seat] = ring[ring[seat]]
+            seat = ring[seat]
+        return seat
 
     def _adjust_active_player_index(self):
-        # Find next active player_hand
-        original_index = self.active_player_index
-        while not self.players[self.active_player_index].can_make_action():
-            self.active_player_index = (self.active_player_index + 1) % len(self.players)
-            if self.active_player_index == original_index:
-                # We've gone all the way around, no active players
-                return False
+        # Find next active player_hand, leaving the index alone if there is none
+        seat = self._next_active(self.active_player_index)
+        if seat is None:
+            return False
+        self.active_player_index = seat
         return True
 
     def player_action(self, action: PlayerAction, amount: int = 0) -> bool:
         player = self.players[self.active_player_index]
+        requested_action, requested_amount = action, amount
         amount = min(amount, player.stack)
 
         # Validate action
         if action == PlayerAction.CHECK and self.current_bet > player.bet_amount:
-            print(f"Cannot check when there's a bet. Current bet: {self.current_bet}")
+            self._reject_action(f"Cannot check when there's a bet. Current bet: {self.current_bet}")
             return False
 
         if action == PlayerAction.CALL:
             amount = self.current_bet - player.bet_amount
 
-        if action in [PlayerAction.BET, PlayerAction.RAISE]:
+        if action in (PlayerAction.BET, PlayerAction.RAISE):
             # For a bet, the minimum is the big blind
             min_amount = self.big_blind
 
@@ -112,7 +292,7 @@ class PokerGame:
                 action = PlayerAction.BET
 
             if amount <= min_amount:
-                print(f"Minimum {action.value} is {min_amount}")
+                self._reject_action(f"Minimum {action.value} is {min_amount}")
                 return False
 
             # Update current bet
@@ -124,19 +304,25 @@ class PokerGame:
             if amount > self.current_bet:
                 self.current_bet = player.bet_amount
 
+        status, bet = player.status, player.bet_amount
         actual_action, actual_amount = player.take_action(action, amount)
+        self._track(self.active_player_index, status, bet)
+        self._sync_stack(self.active_player_index)
         self.pot += actual_amount
-        self.action_history.append((self.phase.value, player.name, actual_action.value, actual_amount))
+        self.action_log.append(self.game_number, self.active_player_index, self.phase.value, actual_action,
+                               actual_amount)
+        if self.recorder is not None:
+            self.recorder.action(self.active_player_index, self.phase, requested_action, requested_amount,
+                                 actual_action, actual_amount)
 
-        # Execute action
-        print(f"{player.name} {actual_action.value}s", end="")
-        if action in [PlayerAction.BET, PlayerAction.RAISE, PlayerAction.CALL]:
-            print(f" {actual_amount}")
-        else:
-            print()
+        if self.sink.enabled:
+            self.sink.emit("action", seat=self.active_player_index, player=player.name, phase=self.phase.value,
+                           action=actual_action.value, requested=action.value, amount=actual_amount)
 
         # Move to next player_hand
-        self.has_played[self.active_player_index] = True
+        if not self.has_played[self.active_player_index]:
+            self.has_played[self.active_player_index] = True
+            self._num_unplayed -= 1
         self.active_player_index = (self.active_player_index + 1) % len(self.players)
 
         # Check if betting round is complete
@@ -149,22 +335,28 @@ class PokerGame:
         self.display_game_state()
         return True
 
+    def _reject_action(self, message: str):
+        if self.sink.enabled:
+            player = self.players[self.active_player_index]
+            self.sink.emit("invalid_action", seat=self.active_player_index, player=player.name, message=message)
+
     def is_betting_round_complete(self) -> bool:
-        for player in self.players:
-            if player.status in [PlayerStatus.FOLDED, PlayerStatus.ALL_IN]:
-                continue
-            if player.bet_amount != self.current_bet:
-                return False
-        return all(self.has_played)
+        # Every matching player has the current bet in front of them, and everybody has acted
+        counts = self.status_counts
+        matched = self._bet_counts.get(self.current_bet, 0)
+        return matched == counts[PlayerStatus.ACTIVE] + counts[PlayerStatus.OUT] and not self._num_unplayed
 
     def advance_game_phase(self):
+        if self.recorder is not None:
+            self.recorder.advance(self.phase)
+
         # Reset bet amounts for the next betting round
 
         if self.num_active_players() + self.num_all_in_players() == 1:  # all players folded except one
             self.direct_showdown()  # go directly to showdown and declare winner
             return
 
-        no_one_active = all([p.status in [PlayerStatus.ALL_IN, PlayerStatus.FOLDED] for p in self.players])
+        no_one_active = not self.status_counts[PlayerStatus.ACTIVE] and not self.status_counts[PlayerStatus.OUT]
         if no_one_active:  # all players other than folded players are all-in
             self.all_in_showdown()  # more than one person are all-in and all others are folded
             return
@@ -172,17 +364,18 @@ class PokerGame:
         for player in self.players:
             player.bet_amount = 0
         self.current_bet = 0
+        self._bet_counts = {0: self.status_counts[PlayerStatus.ACTIVE] + self.status_counts[PlayerStatus.OUT]}
 
         # Move to the next phase
         if self.phase == GamePhase.PRE_FLOP:
             self.phase = GamePhase.FLOP
-            self.community_cards.extend(self.deck.deal(3))
+            self._deal_community_cards(3)
         elif self.phase == GamePhase.FLOP:
             self.phase = GamePhase.TURN
-            self.community_cards.extend(self.deck.deal(1))
+            self._deal_community_cards(1)
         elif self.phase == GamePhase.TURN:
             self.phase = GamePhase.RIVER
-            self.community_cards.extend(self.deck.deal(1))
+            self._deal_community_cards(1)
         elif self.phase == GamePhase.RIVER:
             self.phase = GamePhase.SHOWDOWN
             self._showdown()
@@ -202,95 +395,170 @@ class PokerGame:
             self):  # if more than one players are all-in first deal sufficient community cards then go to showdown
         num_remaining = 5 - len(self.community_cards)
         if num_remaining > 0:
-            self.community_cards.extend(self.deck.deal(num_remaining))
+            self._deal_community_cards(num_remaining)
 
         self.phase = GamePhase.SHOWDOWN
         self._showdown()
         return
 
     def _showdown(self):
-        # Evaluate hands for all players who haven't folded
-        active_players = [p for p in self.players if p.status != PlayerStatus.FOLDED]
+        # Seats of all players who haven't folded
+        contenders = [i for i, p in enumerate(self.players) if p.status in (PlayerStatus.ACTIVE, PlayerStatus.ALL_IN)]
 
-        if len(active_players) == 1:
+        if len(contenders) == 1:
             # Only one player_hand left, they win automatically
-            winner = active_players[0]
+            seat = contenders[0]
+            winner = self.players[seat]
             winner.stack += self.pot
-            print(f"{winner.name} wins {self.pot} chips")
+            self._sync_stack(seat)
+            if self.sink.enabled:
+                self.sink.emit("win", seat=seat, player=winner.name, amount=self.pot, hand_rank=None)
+            if self.recorder is not None:
+                self.recorder.win(seat, self.pot, 0)
+                self.recorder.end_hand(self)
             return
 
-        # Evaluate hands
-        results = []
-        print("\n=== SHOWDOWN ===")
-        for player in active_players:
-            result = HandEvaluator.evaluate_hand(player.hole_cards, self.community_cards)
-            results.append((player, result))
-
-            print(f"{player.name}: {[str(c) for c in player.hole_cards]} - {result.hand_rank.name}")
-
-        # Find the winner(s)
-        results.sort(key=lambda x: (x[1].hand_rank.value, x[1].hand_value), reverse=True)
-        best_result = results[0][1]
-
+        # Evaluate hands against the shared board and find the winner(s) in one pass
+        if self.sink.enabled:
+            self.sink.emit("showdown")
+        strengths = HandEvaluator.score_holdings(self.board_indices, [self.hole_indices[i] for i in contenders])
+        best_strength = -1
         winners = []
-        for player, result in results:
-            if (result.hand_rank == best_result.hand_rank and
-                    result.hand_value == best_result.hand_value):
-                winners.append(player)
+        for seat, strength in zip(contenders, strengths):
+            if strength > best_strength:
+                best_strength = strength
+                winners = [seat]
+            elif strength == best_strength:
+                winners.append(seat)
+
+            if self.sink.enabled:
+                self.sink.emit("hand_shown", seat=seat, player=self.players[seat].name,
+                               cards=list(self.hole_indices[seat]), hand_rank=HandEvaluator.hand_rank(strength).name)
+        best_rank = HandEvaluator.hand_rank(best_strength)
 
         # Distribute the pot
         split_amount = self.pot // len(winners)
         remainder = self.pot % len(winners)
 
-        for player in winners:
+        for seat in winners:
+            player = self.players[seat]
             winnings = split_amount
             if remainder > 0:
                 winnings += 1
                 remainder -= 1
 
             player.stack += winnings
-            print(f"{player.name} wins {winnings} chips with {best_result.hand_rank.name}")
+            self._sync_stack(seat)
+            if self.sink.enabled:
+                self.sink.emit("win", seat=seat, player=player.name, amount=winnings, hand_rank=best_rank.name)
+            if self.recorder is not None:
+                self.recorder.win(seat, winnings, best_strength)
+        if self.recorder is not None:
+            self.recorder.end_hand(self)
 
     def display_game_state(self):
-        print(f"\nPhase: {self.phase.value}")
-        print(f"Pot: {self.pot}")
-
-        if self.community_cards:
-            print(f"Community cards: {[str(c) for c in self.community_cards]}")
-
-        print("\nPlayers:")
-        for i, player in enumerate(self.players):
-            position = ""
-            if i == self.button_position:
-                position = "(BTN)"
-
-            cards = "[hidden]"
-            if player.status == PlayerStatus.FOLDED:
-                cards = "folded"
-            elif player.status == PlayerStatus.OUT:
-                cards = "out"
-
-            active = "→ " if i == self.active_player_index and player.can_make_action() else "  "
-
-            print(f"{active}{player.name} {position}: ${player.stack} {cards} {player.status.value}")
+        if not self.sink.enabled:
+            return
+        self.sink.emit(
+            "state",
+            phase=self.phase.value,
+            pot=self.pot,
+            board=list(self.board_indices),
+            button=self.button_position,
+            active_player=self.active_player_index,
+            players=[{"name": p.name, "stack": p.stack, "status": p.status.value} for p in self.players],
+        )
 
     def _reset_has_played(self):
-        self.has_played = [False if player.status == PlayerStatus.ACTIVE else True for player in self.players]
+        has_played = self.has_played
+        for seat, player in enumerate(self.players):
+            has_played[seat] = player.status is not PlayerStatus.ACTIVE
+        self._num_unplayed = self.status_counts[PlayerStatus.ACTIVE]
 
     def num_active_players(self) -> int:
-        return len([p for p in self.players if p.status == PlayerStatus.ACTIVE])
+        return self.status_counts[PlayerStatus.ACTIVE]
 
     def num_all_in_players(self) -> int:  # players who are all in
-        return len([p for p in self.players if p.status == PlayerStatus.ALL_IN])
+        return self.status_counts[PlayerStatus.ALL_IN]
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        Captures the state of the hand in progress, in a few microseconds. Hand
+        it to restore() to go back to it, or to apply() to branch from it
+        without touching this game.
+        """
+        players = self.players
+        return GameSnapshot(self.phase, self.button_position, self.active_player_index, self.pot, self.current_bet,
+                            self.big_blind, self.game_number, tuple(self.board_indices),
+                            tuple([(hole[0], hole[1]) for hole in self.hole_indices]),
+                            tuple([player.stack for player in players]),
+                            tuple([player.bet_amount for player in players]),
+                            tuple([player.status for player in players]), tuple(self.has_played),
+                            tuple(self.deck.indices), self.deck.num_dealt, self.action_log.end)
+
+    def restore(self, snapshot: GameSnapshot):
+        """
+        Puts the table back as it was when snapshot() was taken: the players'
+        stacks, bets, statuses and cards, the board, the deck and the turn. The
+        action history is rewound to the snapshot too, as long as it still
+        holds that point; snapshots made by apply() were never logged, so they
+        leave the history alone. Nothing is sent to the sink or the recorder, and cards
+        dealt afterwards come from the deck's random generator as it is now.
+        """
+        if len(snapshot.stacks) != len(self.players):
+            raise ValueError(f"Snapshot of a {len(snapshot.stacks)} seat table, this one has {len(self.players)}")
+        self.phase = snapshot.phase
+        self.button_position = snapshot.button
+        self.active_player_index = snapshot.active
+        self.pot = snapshot.pot
+        self.current_bet = snapshot.current_bet
+        self.big_blind = snapshot.big_blind
+        self.game_number = snapshot.game_number
+
+        self.board_indices = list(snapshot.board)
+        self.community_cards = [CARDS[index] for index in snapshot.board if index]
+        self.state.clear_cards()
+        for i, index in enumerate(snapshot.board):
+            self.state.data[COMMUNITY_CARDS + i] = index
+        self.hole_indices = [list(hole) for hole in snapshot.holes]
+        for seat, player in enumerate(self.players):
+            card1, card2 = snapshot.holes[seat]
+            player.hole_cards = [CARDS[card1], CARDS[card2]] if card1 else []
+            player.stack = snapshot.stacks[seat]
+            player.bet_amount = snapshot.bets[seat]
+            player.status = snapshot.statuses[seat]
+            self._sync_stack(seat)
+        self.has_played[:] = snapshot.has_played
+        self.deck.indices[:] = snapshot.deck
+        self.deck.num_dealt = snapshot.dealt
+        self._recount()
+
+        log = self.action_log
+        # log.base is never negative, so a log_end of -1 leaves the log alone
+        if log.base <= snapshot.log_end < log.end:
+            log.truncate(snapshot.log_end)
+            self.feed_cursors = [min(cursor, snapshot.log_end) for cursor in self.feed_cursors]
 
     def get_player_input(self) -> bool:
-        player = self.players[self.active_player_index]
+        seat = self.active_player_index
+        player = self.players[seat]
+        events = []
+        if self.feed_cursors[seat] < self.action_log.end:
+            events = self.action_log.events_since(self.feed_cursors[seat])
+            self.feed_cursors[seat] = self.action_log.end
         game_state = self.get_game_state()
-        action=player.action(game_state, self.action_history)
-        print(action)
+        if self.instruments is None:
+            action = self.runner.decide(seat, player, events, game_state, self.action_history)
+        else:
+            start = time.perf_counter()
+            action = self.runner.decide(seat, player, events, game_state, self.action_history)
+            self.instruments.record_decision(player.name, self.phase.value, time.perf_counter() - start)
+        if self.sink.enabled:
+            self.sink.emit("decision", seat=self.active_player_index, player=player.name,
+                           action=action[0].value, amount=action[1])
         return self.player_action(action[0], action[1])
 
-    def get_game_state(self) -> list[int]:
+    def get_game_state(self) -> GameStateView:
         """
         Returns the current game state in the following structure:
         <1. Hole Cards' Index>
@@ -319,21 +587,61 @@ class PokerGame:
         stack4
         <9. Game number>
         game_number
+
+        The field offsets are defined in game_state. The result is a read-only view of
+        a buffer the game updates in place; only the hole cards are written here.
         """
-        player = self.players[self.active_player_index]
-        player_cards = [card.get_index() for card in player.hole_cards] + (2 - len(player.hole_cards)) * [0]
-        community_cards = [card.get_index() for card in self.community_cards] + (5 - len(self.community_cards)) * [0]
-        return [
-            *player_cards,
-            *community_cards,
-            self.pot,
-            self.current_bet,
-            self.big_blind,
-            self.active_player_index,
-            len(self.players),
-            *(p.stack for p in self.players),
-            self.game_number,
-        ]
+        hole_cards = self.hole_indices[self.active_player_index]
+        self.state.data[HOLE_CARDS] = hole_cards[0]
+        self.state.data[HOLE_CARDS + 1] = hole_cards[1]
+        return self.state.view
+
+
+# Headless tables that apply() and advance() restore snapshots into, one per
+# thread and table size
+_scratch = threading.local()
+
+
+def _scratch_game(num_players: int) -> PokerGame:
+    games = getattr(_scratch, "games", None)
+    if games is None:
+        games = _scratch.games = {}
+    game = games.get(num_players)
+    if game is None:
+        players = [Player(f"Seat {seat + 1}", 0) for seat in range(num_players)]
+        game = games[num_players] = PokerGame(players, big_blind=0, sink=NullSink(), history_hands=1)
+    return game
+
+
+def apply(snapshot: GameSnapshot, action: PlayerAction, amount: int = 0,
+          rng: Optional[random.Random] = None) -> Optional[GameSnapshot]:
+    """
+    The snapshot after the seat to act plays action, exactly as
+    PokerGame.player_action would play it (advancing the phase, dealing and
+    paying out the showdown included), or None if the action is invalid.
+    Leaves every game untouched; cards dealt along the way are drawn with rng
+    (the module level random generator by default). The action is not in any
+    game's log, so the snapshot's log_end is -1.
+    """
+    game = _scratch_game(len(snapshot.stacks))
+    game.restore(snapshot)
+    game.deck.rng = rng if rng is not None else random
+    start = game.action_log.end
+    valid = game.player_action(action, amount)
+    game.action_log.truncate(start)
+    return game.snapshot()._replace(log_end=-1) if valid else None
+
+
+def advance(snapshot: GameSnapshot, rng: Optional[random.Random] = None) -> GameSnapshot:
+    """
+    The snapshot after PokerGame.advance_game_phase, as apply() does for
+    actions. No action is played, so the snapshot keeps its log position.
+    """
+    game = _scratch_game(len(snapshot.stacks))
+    game.restore(snapshot)
+    game.deck.rng = rng if rng is not None else random
+    game.advance_game_phase()
+    return game.snapshot()._replace(log_end=snapshot.log_end)
 
 
 if __name__ == "__main__":
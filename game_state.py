@@ -0,0 +1,75 @@
+from array import array
+from collections.abc import Sequence
+
+# Layout of the game state vector passed to Player.action.
+HOLE_CARDS = 0  # 2 entries: the acting player's hole card indices
+COMMUNITY_CARDS = 2  # 5 entries: community card indices, 0 means not yet dealt
+POT = 7
+CURRENT_BET = 8  # the current raise amount, including the big blind
+BLIND = 9
+ACTIVE_PLAYER = 10  # index of the acting player
+NUM_PLAYERS = 11
+STACKS = 12  # one entry per player, in seat order, followed by the game number
+
+
+def game_number_offset(num_players: int) -> int:
+    return STACKS + num_players
+
+
+def state_size(num_players: int) -> int:
+    return STACKS + num_players + 1
+
+
+class GameStateView(Sequence):
+    """
+    Read-only view of a game state buffer. Indexing returns ints and slicing
+    returns lists, so it can be used like the list it replaces. The view is live:
+    it changes as the game goes on, use tolist() to keep a snapshot.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, data: array):
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._data[index].tolist()
+        return self._data[index]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, GameStateView):
+            other = other._data
+        return self._data.tolist() == list(other)
+
+    def __repr__(self) -> str:
+        return repr(self._data.tolist())
+
+    def tolist(self) -> list:
+        return self._data.tolist()
+
+
+class GameStateBuffer:
+    """
+    Fixed-layout game state vector that the engine keeps up to date as cards are
+    dealt and chips move, so handing it to a player costs O(1).
+    """
+
+    def __init__(self, num_players: int):
+        self.num_players = num_players
+        self.data = array("q", bytes(8 * state_size(num_players)))
+        self.data[NUM_PLAYERS] = num_players
+        self.view = GameStateView(self.data)
+
+    @property
+    def game_number_index(self) -> int:
+        return game_number_offset(self.num_players)
+
+    def clear_cards(self):
+        for i in range(HOLE_CARDS, COMMUNITY_CARDS + 5):
+            self.data[i] = 0
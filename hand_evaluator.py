@@ -1,8 +1,14 @@
+import mmap
+import os
+import struct
+import threading
+from array import array
 from enum import Enum
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
 from collections import Counter
-from card import Card
+from itertools import combinations
+from card import Card, CARD_MASKS, mask_to_indices
 
 
 class HandRank(Enum):
@@ -25,19 +31,356 @@ class HandResult:
     best_hand: List[Card]
 
 
+# Strength codes pack the hand category above five 4-bit rank nibbles, so a
+# plain integer comparison orders hands exactly like
+# (hand_rank.value, hand_value) does.
+_CATEGORY_SHIFT = 20
+_VALUE_LENGTHS = {1: 5, 2: 4, 3: 3, 4: 3, 5: 1, 6: 5, 7: 2, 8: 2, 9: 1, 10: 1}
+
+# Per-card lookup keys, indexed by Card.get_index() (index 0 means "no card").
+# The low 32 bits hold a base-5 rank histogram, the high bits a 4-bit counter
+# per suit. Summing the keys of a hand gives a single integer from which both
+# the rank multiset and the suit counts can be read back.
+_SUIT_SHIFT = 32
+_RANK_MASK = (1 << _SUIT_SHIFT) - 1
+# Biasing every suit counter by 3 makes a count of 5+ set the nibble's top bit
+_FLUSH_BIAS = 0x3333 << _SUIT_SHIFT
+_FLUSH_CHECK = 0x8888 << _SUIT_SHIFT
+
+_CARD_KEYS = [0] + [(5 ** (i % 13)) | (1 << (_SUIT_SHIFT + 4 * (i // 13))) for i in range(52)]
+_CARD_RANK_BITS = [0] + [1 << (i % 13) for i in range(52)]
+_CARD_SUITS = [-1] + [i // 13 for i in range(52)]
+
+# Built on first use: rank histogram key -> strength, suited rank mask -> strength
+_RANK_TABLE = None
+_FLUSH_TABLE = None
+# The rank table as (keys, strengths) sequences sorted by key, for batch_evaluator
+_RANK_ARRAYS = None
+# Held while building, so threads evaluating at the same time build the tables once
+_BUILD_LOCK = threading.Lock()
+
+# Computing the tables takes about half a second, so they are cached in this
+# file after the first build and memory-mapped by later processes. Bump the
+# version whenever the strength encoding or the file layout changes.
+TABLE_VERSION = 1
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "evaluator_tables.bin")
+# Magic, version, byte order mark, rank table entries, flush table entries; then
+# the sorted rank keys (uint64), their strengths and the flush strengths (uint32)
+_TABLE_HEADER = struct.Struct("=4sHHII")
+_TABLE_MAGIC = b"PKEV"
+_BYTE_ORDER_MARK = 0x0102
+
+
+def _encode(category: int, values) -> int:
+    strength = category
+    for i in range(5):
+        strength = (strength << 4) | (values[i] if i < len(values) else 0)
+    return strength
+
+
+def _straight_high(mask: int) -> int:
+    """Returns the high card of the best straight in a rank mask (bit 0 = deuce), or 0."""
+    extended = (mask << 1) | ((mask >> 12) & 1)  # ace also plays low
+    for top in range(13, 3, -1):
+        window = 0b11111 << (top - 4)
+        if extended & window == window:
+            return top + 1
+    return 0
+
+
+def _flush_strength(mask: int) -> int:
+    high = _straight_high(mask)
+    if high == 14:
+        return _encode(HandRank.ROYAL_FLUSH.value, (10,))
+    if high:
+        return _encode(HandRank.STRAIGHT_FLUSH.value, (high,))
+    ranks = [r + 2 for r in range(12, -1, -1) if mask >> r & 1]
+    return _encode(HandRank.FLUSH.value, ranks[:5])
+
+
+def _rank_counts_strength(counts: List[int]) -> int:
+    by_count = {1: [], 2: [], 3: [], 4: []}
+    mask = 0
+    for r in range(12, -1, -1):
+        if counts[r]:
+            by_count[counts[r]].append(r + 2)
+            mask |= 1 << r
+    present = [r + 2 for r in range(12, -1, -1) if counts[r]]
+    quads, trips, pairs = by_count[4], by_count[3], by_count[2]
+
+    if quads:
+        kicker = max(r for r in present if r != quads[0])
+        return _encode(HandRank.FOUR_OF_A_KIND.value, (quads[0], kicker))
+    if trips and (len(trips) > 1 or pairs):
+        pair = max(trips[1:] + pairs)
+        return _encode(HandRank.FULL_HOUSE.value, (trips[0], pair))
+    high = _straight_high(mask)
+    if high:
+        return _encode(HandRank.STRAIGHT.value, (high,))
+    if trips:
+        kickers = [r for r in present if r != trips[0]][:2]
+        return _encode(HandRank.THREE_OF_A_KIND.value, (trips[0], *kickers))
+    if len(pairs) > 1:
+        kicker = max(r for r in present if r not in pairs[:2])
+        return _encode(HandRank.TWO_PAIR.value, (pairs[0], pairs[1], kicker))
+    if pairs:
+        kickers = [r for r in present if r != pairs[0]][:3]
+        return _encode(HandRank.PAIR.value, (pairs[0], *kickers))
+    return _encode(HandRank.HIGH_CARD.value, present[:5])
+
+
+def _build_tables():
+    with _BUILD_LOCK:
+        if _RANK_TABLE is None:
+            _build_tables_locked()
+
+
+def _build_tables_locked():
+    global _RANK_TABLE, _FLUSH_TABLE, _RANK_ARRAYS
+    arrays = _load_table_file(TABLE_PATH)
+    if arrays is None:
+        rank_table, flush_table = _compute_tables()
+        keys = array("Q", sorted(rank_table))
+        arrays = keys, array("I", [rank_table[key] for key in keys]), array("I", flush_table)
+        _save_table_file(TABLE_PATH, *arrays)
+    keys, strengths, flush_strengths = arrays
+    _RANK_ARRAYS = keys, strengths
+    _FLUSH_TABLE = list(flush_strengths)
+    # Set last: the other functions only check this one before using all three
+    _RANK_TABLE = dict(zip(keys, strengths))
+
+
+def _load_table_file(path: str) -> Optional[Tuple]:
+    """Memory-maps a table file, returning (rank keys, rank strengths, flush strengths) views, or None if unusable."""
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(data) < _TABLE_HEADER.size:
+        return None
+    magic, version, byte_order, num_ranks, num_flushes = _TABLE_HEADER.unpack_from(data)
+    if (magic, version, byte_order, num_flushes) != (_TABLE_MAGIC, TABLE_VERSION, _BYTE_ORDER_MARK, 1 << 13) \
+            or len(data) != _TABLE_HEADER.size + 12 * num_ranks + 4 * num_flushes:
+        return None
+    view = memoryview(data)
+    start = _TABLE_HEADER.size
+    keys = view[start:start + 8 * num_ranks].cast("Q")
+    start += 8 * num_ranks
+    strengths = view[start:start + 4 * num_ranks].cast("I")
+    flush_strengths = view[start + 4 * num_ranks:].cast("I")
+    return keys, strengths, flush_strengths
+
+
+def _save_table_file(path: str, keys: array, strengths: array, flush_strengths: array):
+    """Writes the tables for later processes. Failing to write (a read-only install) only costs them the rebuild."""
+    if keys.itemsize != 8 or strengths.itemsize != 4:
+        return
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(_TABLE_HEADER.pack(_TABLE_MAGIC, TABLE_VERSION, _BYTE_ORDER_MARK, len(keys), len(flush_strengths)))
+            f.write(keys.tobytes())
+            f.write(strengths.tobytes())
+            f.write(flush_strengths.tobytes())
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def _compute_tables():
+    flush_table = [0] * (1 << 13)
+    for mask in range(1 << 13):
+        if bin(mask).count("1") >= 5:
+            flush_table[mask] = _flush_strength(mask)
+
+    # Every rank multiset of 5 to 7 cards with at most four cards per rank
+    rank_table = {}
+    counts = [0] * 13
+
+    def visit(rank: int, cards_left: int, key: int, size: int):
+        if rank == 13:
+            if size >= 5:
+                rank_table[key] = _rank_counts_strength(counts)
+            return
+        for count in range(min(4, cards_left) + 1):
+            counts[rank] = count
+            visit(rank + 1, cards_left - count, key + count * 5 ** rank, size + count)
+        counts[rank] = 0
+
+    visit(0, 7, 0, 0)
+    return rank_table, flush_table
+
+
+def _lookup_tables():
+    if _RANK_TABLE is None:
+        _build_tables()
+    return _RANK_TABLE, _FLUSH_TABLE
+
+
+def _rank_arrays():
+    """The rank table as (keys, strengths) sequences sorted by key."""
+    if _RANK_TABLE is None:
+        _build_tables()
+    return _RANK_ARRAYS
+
+
 class HandEvaluator:
     @staticmethod
     def evaluate_hand(player_cards: List[Card], community_cards: List[Card]) -> HandResult:
         all_cards = player_cards + community_cards
-        
-        # Check all 5-card combinations from the 7 cards
+        if 5 <= len(all_cards) <= 7:
+            strength = HandEvaluator.evaluate_indices([card.get_index() for card in all_cards])
+            return HandEvaluator.result_from_strength(strength, all_cards)
+        return HandEvaluator._evaluate_combinations(all_cards)
+
+    @staticmethod
+    def evaluate_strength(player_cards: List[Card], community_cards: List[Card]) -> int:
+        """
+        Returns the integer strength of the best 5-card hand out of 5 to 7 cards.
+        Higher is better and equal strengths tie.
+        """
+        return HandEvaluator.evaluate_indices([card.get_index() for card in player_cards + community_cards])
+
+    @staticmethod
+    def evaluate_indices(indices: List[int]) -> int:
+        """
+        Same as evaluate_strength, but takes card indices as returned by Card.get_index().
+        Indices of 0 (not yet dealt) are ignored.
+        """
+        if _RANK_TABLE is None:
+            _build_tables()
+        total = _FLUSH_BIAS
+        for index in indices:
+            total += _CARD_KEYS[index]
+        flush = total & _FLUSH_CHECK
+        if not flush:
+            return _RANK_TABLE[total & _RANK_MASK]
+
+        suit = (flush.bit_length() - _SUIT_SHIFT - 4) // 4
+        mask = 0
+        for index in indices:
+            if _CARD_SUITS[index] == suit:
+                mask |= _CARD_RANK_BITS[index]
+        return _FLUSH_TABLE[mask]
+
+    @staticmethod
+    def partial_key(indices: List[int]) -> Tuple[int, int]:
+        """
+        Evaluator state of a partial hand, as (key, card mask), so that hands
+        sharing cards (a board, a player's hole cards) only pay for those cards
+        once. Add a card with card_key(index) and card.CARD_MASKS[index], and
+        score 5 to 7 cards worth of state with evaluate_key. Indices of 0 are ignored.
+        """
+        key = _FLUSH_BIAS
+        card_mask = 0
+        for index in indices:
+            key += _CARD_KEYS[index]
+            card_mask |= CARD_MASKS[index]
+        return key, card_mask
+
+    @staticmethod
+    def card_key(index: int) -> int:
+        return _CARD_KEYS[index]
+
+    @staticmethod
+    def evaluate_key(key: int, card_mask: int) -> int:
+        """
+        Strength of the 5 to 7 cards summed into a partial_key state.
+        """
+        if _RANK_TABLE is None:
+            _build_tables()
+        flush = key & _FLUSH_CHECK
+        if not flush:
+            return _RANK_TABLE[key & _RANK_MASK]
+        suit = (flush.bit_length() - _SUIT_SHIFT - 4) // 4
+        return _FLUSH_TABLE[(card_mask >> (13 * suit)) & 0x1FFF]
+
+    @staticmethod
+    def score_holdings(community_cards: List[int], holdings: List[List[int]]) -> List[int]:
+        """
+        Strengths of several hole card pairs on one five card board, given as card
+        indices. The board is summed into a partial key once, so each holding only
+        adds its own two cards before the table lookup.
+        """
+        if _RANK_TABLE is None:
+            _build_tables()
+        board_key, board_mask = HandEvaluator.partial_key(community_cards)
+        strengths = []
+        for card1, card2 in holdings:
+            key = board_key + _CARD_KEYS[card1] + _CARD_KEYS[card2]
+            flush = key & _FLUSH_CHECK
+            if flush:
+                suit = (flush.bit_length() - _SUIT_SHIFT - 4) // 4
+                card_mask = board_mask | CARD_MASKS[card1] | CARD_MASKS[card2]
+                strengths.append(_FLUSH_TABLE[(card_mask >> (13 * suit)) & 0x1FFF])
+            else:
+                strengths.append(_RANK_TABLE[key & _RANK_MASK])
+        return strengths
+
+    @staticmethod
+    def evaluate_mask(card_mask: int) -> int:
+        """
+        Same as evaluate_indices, but takes a card set bitmask as built by card.indices_to_mask().
+        """
+        return HandEvaluator.evaluate_indices(list(mask_to_indices(card_mask)))
+
+    @staticmethod
+    def hand_rank(strength: int) -> HandRank:
+        return HandRank(strength >> _CATEGORY_SHIFT)
+
+    @staticmethod
+    def hand_value(strength: int) -> Tuple:
+        category = strength >> _CATEGORY_SHIFT
+        nibbles = [(strength >> shift) & 0xF for shift in (16, 12, 8, 4, 0)]
+        return tuple(nibbles[:_VALUE_LENGTHS[category]])
+
+    @staticmethod
+    def result_from_strength(strength: int, cards: List[Card]) -> HandResult:
+        """
+        Expands an integer strength back into a HandResult, picking the five cards
+        that make the hand out of the cards it was evaluated from.
+        """
+        hand_rank = HandEvaluator.hand_rank(strength)
+        hand_value = HandEvaluator.hand_value(strength)
+
+        if hand_rank in (HandRank.FLUSH, HandRank.STRAIGHT_FLUSH, HandRank.ROYAL_FLUSH):
+            suit = Counter(card.suit for card in cards).most_common(1)[0][0]
+            cards = [card for card in cards if card.suit == suit]
+
+        if hand_rank in (HandRank.STRAIGHT, HandRank.STRAIGHT_FLUSH, HandRank.ROYAL_FLUSH):
+            high = 14 if hand_rank == HandRank.ROYAL_FLUSH else hand_value[0]
+            needed = Counter(14 if r == 1 else r for r in range(high - 4, high + 1))
+        elif hand_rank == HandRank.FOUR_OF_A_KIND:
+            needed = Counter({hand_value[0]: 4, hand_value[1]: 1})
+        elif hand_rank == HandRank.FULL_HOUSE:
+            needed = Counter({hand_value[0]: 3, hand_value[1]: 2})
+        elif hand_rank == HandRank.THREE_OF_A_KIND:
+            needed = Counter({hand_value[0]: 3}) + Counter(hand_value[1:])
+        elif hand_rank == HandRank.TWO_PAIR:
+            needed = Counter({hand_value[0]: 2, hand_value[1]: 2}) + Counter(hand_value[2:])
+        elif hand_rank == HandRank.PAIR:
+            needed = Counter({hand_value[0]: 2}) + Counter(hand_value[1:])
+        else:
+            needed = Counter(hand_value)
+
+        best_hand = []
+        for card in cards:
+            if needed[card.rank.value] > 0:
+                needed[card.rank.value] -= 1
+                best_hand.append(card)
+        return HandResult(hand_rank, hand_value, best_hand)
+
+    @staticmethod
+    def _evaluate_combinations(all_cards: List[Card]) -> HandResult:
+        # Check all 5-card combinations from the cards
         best_hand_rank = HandRank.HIGH_CARD
         best_hand_value = (0,)
         best_hand = []
         
-        # For a real engine, this would use a more efficient algorithm
-        # Instead of checking all combinations
-        from itertools import combinations
         for hand in combinations(all_cards, 5):
             hand_result = HandEvaluator._evaluate_five_card_hand(list(hand))
             
@@ -0,0 +1,353 @@
+"""
+Binary hand histories. A HandHistoryWriter hooked into a PokerGame (pass it as
+recorder=) appends every hand to segment files of fixed-width records; a
+HandHistoryReader memory-maps the segments to iterate or index hands, and
+replay_hand re-drives a PokerGame through any recorded hand.
+
+    python hand_history.py histories/            # one line per hand
+    python hand_history.py histories/ --hand 12  # replay a hand on the console
+"""
+import argparse
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+from events import ConsoleSink, EventSink, NullSink
+from game import GamePhase, PokerGame
+from player import Player, PlayerAction, PlayerStatus
+
+MAGIC = b"PKHH"
+VERSION = 1
+# Segment header: magic, version, record size, number of seats, name field size.
+# It is followed by one UTF-8 name field per seat, then by the records.
+HEADER = struct.Struct("<4sHHHH")
+NAME_SIZE = 32
+# Every record: kind, seat, a, b, x, y. What a, b, x and y hold depends on the kind.
+RECORD = struct.Struct("<BBBBxxxxqq")
+SEGMENT_BYTES = 64 << 20
+
+# Record kinds. A hand is the run of records from HAND to END, always written as a whole.
+HAND = 1     # seat: number of seats, a: button, x: big blind, y: hand number
+SEAT = 2     # a, b: hole cards (0 if not dealt), x: status code, y: stack before the blind
+BLIND = 3    # y: amount posted
+ACTION = 4   # a: phase code, b: requested << 4 | action code, x: requested amount, y: amount put in
+ADVANCE = 5  # a: phase code the game advanced from
+DEAL = 6     # a: phase code, b: number of cards, x: card indices, one per byte
+WIN = 7      # a: hand category (0 when uncontested), x: amount, y: strength
+END = 8      # a: 1 if the hand was abandoned before the showdown, x: pot, y: number of records
+
+_PHASES = list(GamePhase)
+_PHASE_CODES = {phase: code for code, phase in enumerate(_PHASES)}
+_ACTIONS = list(PlayerAction)
+_ACTION_CODES = {action: code for code, action in enumerate(_ACTIONS)}
+_STATUSES = list(PlayerStatus)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+
+
+class RecordedAction(NamedTuple):
+    seat: int
+    phase: GamePhase
+    requested: PlayerAction  # what was passed to PokerGame.player_action
+    requested_amount: int
+    action: PlayerAction  # what the player ended up doing
+    amount: int
+
+
+@dataclass
+class HandRecord:
+    hand_number: int
+    button: int
+    big_blind: int
+    names: List[str]
+    stacks: List[int]  # at the start of the hand, before the blind
+    statuses: List[PlayerStatus]
+    hole_cards: List[Tuple[int, int]]
+    # Raw (kind, seat, a, b, x, y) records in the order they happened
+    records: List[Tuple[int, int, int, int, int, int]]
+
+    @property
+    def complete(self) -> bool:
+        return not self.records[-1][2]
+
+    @property
+    def actions(self) -> List[RecordedAction]:
+        return [RecordedAction(seat, _PHASES[a], _ACTIONS[b >> 4], x, _ACTIONS[b & 15], y)
+                for kind, seat, a, b, x, y in self.records if kind == ACTION]
+
+    @property
+    def blinds(self) -> List[Tuple[int, int]]:
+        return [(seat, y) for kind, seat, a, b, x, y in self.records if kind == BLIND]
+
+    @property
+    def board(self) -> List[int]:
+        cards = []
+        for kind, seat, a, b, x, y in self.records:
+            if kind == DEAL:
+                cards.extend(x >> (8 * i) & 0xFF for i in range(b))
+        return cards
+
+    @property
+    def wins(self) -> List[Tuple[int, int, int]]:
+        """(seat, amount, strength) for every payout, strength is 0 when the pot was uncontested."""
+        return [(seat, x, y) for kind, seat, a, b, x, y in self.records if kind == WIN]
+
+    @property
+    def deal_order(self) -> List[int]:
+        """Card indices in the order the deck dealt them: hole cards in seat order, then the board."""
+        return [card for hole in self.hole_cards for card in hole if card] + self.board
+
+    @property
+    def final_stacks(self) -> List[int]:
+        stacks = list(self.stacks)
+        for kind, seat, a, b, x, y in self.records:
+            if kind in (BLIND, ACTION):
+                stacks[seat] -= y
+            elif kind == WIN:
+                stacks[seat] += x
+        return stacks
+
+
+class HandHistoryWriter:
+    """
+    Records the hands of a PokerGame into append-only segment files named
+    <prefix>-000000.phh, <prefix>-000001.phh, ... in directory. A new segment is
+    started when the current one passes segment_bytes, when the seat names
+    change, and every time a writer is opened, so existing files are never modified.
+
+    A hand is buffered until the showdown and then written in one go, so readers
+    never see half a hand. Call flush() or close() to push buffered data to disk.
+    """
+
+    def __init__(self, directory: str, prefix: str = "hands", segment_bytes: int = SEGMENT_BYTES):
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        existing = segment_paths(directory, prefix)
+        self.segment_number = int(existing[-1][-10:-4]) + 1 if existing else 0
+        self.file = None
+        self.names: Optional[List[str]] = None
+        self.hands = 0
+        self._buffer = bytearray()
+        self._num_records = 0
+
+    def _append(self, kind: int, seat: int = 0, a: int = 0, b: int = 0, x: int = 0, y: int = 0):
+        self._buffer += RECORD.pack(kind, seat, a, b, x, y)
+        self._num_records += 1
+
+    def start_hand(self, game: PokerGame):
+        if self._buffer:
+            self._finish(abandoned=True, pot=0)
+        names = [player.name for player in game.players]
+        if names != self.names:
+            self._open_segment(names)
+        self._append(HAND, len(game.players), game.button_position, 0, game.big_blind, game.game_number)
+        for seat, player in enumerate(game.players):
+            hole = game.hole_indices[seat]
+            self._append(SEAT, seat, hole[0], hole[1], _STATUS_CODES[player.status], player.stack)
+
+    def blind(self, seat: int, amount: int):
+        self._append(BLIND, seat, y=amount)
+
+    def action(self, seat: int, phase: GamePhase, requested: PlayerAction, requested_amount: int,
+               action: PlayerAction, amount: int):
+        self._append(ACTION, seat, _PHASE_CODES[phase], _ACTION_CODES[requested] << 4 | _ACTION_CODES[action],
+                     requested_amount, amount)
+
+    def advance(self, phase: GamePhase):
+        self._append(ADVANCE, a=_PHASE_CODES[phase])
+
+    def deal(self, phase: GamePhase, cards: List[int]):
+        packed = 0
+        for i, card in enumerate(cards):
+            packed |= card << (8 * i)
+        self._append(DEAL, a=_PHASE_CODES[phase], b=len(cards), x=packed)
+
+    def win(self, seat: int, amount: int, strength: int):
+        self._append(WIN, seat, strength >> 20, x=amount, y=strength)
+
+    def end_hand(self, game: PokerGame):
+        self._finish(abandoned=False, pot=game.pot)
+
+    def _finish(self, abandoned: bool, pot: int):
+        self._append(END, a=int(abandoned), x=pot, y=self._num_records + 1)
+        self.file.write(self._buffer)
+        self._buffer.clear()
+        self._num_records = 0
+        self.hands += 1
+        if self.file.tell() >= self.segment_bytes:
+            self._open_segment(self.names)
+
+    def _open_segment(self, names: List[str]):
+        if self.file is not None:
+            self.file.close()
+        path = os.path.join(self.directory, f"{self.prefix}-{self.segment_number:06d}.phh")
+        self.segment_number += 1
+        self.file = open(path, "xb")
+        self.names = names
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(names), NAME_SIZE))
+        for name in names:
+            self.file.write(name.encode()[:NAME_SIZE].ljust(NAME_SIZE, b"\0"))
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self._buffer:
+            self._finish(abandoned=True, pot=0)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> "HandHistoryWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def segment_paths(directory: str, prefix: str = "hands") -> List[str]:
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith(prefix + "-") and name.endswith(".phh") and len(name) == len(prefix) + 11)
+    return [os.path.join(directory, name) for name in names]
+
+
+class _Segment:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, num_seats, name_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a hand history segment")
+        if version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} has format version {version}, expected {VERSION}")
+        names_offset = HEADER.size
+        self.names = [self.map[names_offset + i * name_size:names_offset + (i + 1) * name_size].rstrip(b"\0").decode()
+                      for i in range(num_seats)]
+        self.data_offset = names_offset + num_seats * name_size
+        # A writer may still be appending: only whole records are read
+        self.num_records = (len(self.map) - self.data_offset) // RECORD.size
+
+    def hand_spans(self) -> List[Tuple[int, int]]:
+        """(first, end) record numbers of every complete hand, found from the kind bytes alone."""
+        end_offset = self.data_offset + self.num_records * RECORD.size
+        kinds = self.map[self.data_offset:end_offset:RECORD.size]
+        spans = []
+        start = kinds.find(HAND)
+        while start >= 0:
+            end = kinds.find(END, start)
+            if end < 0:
+                break
+            spans.append((start, end + 1))
+            start = kinds.find(HAND, end)
+        return spans
+
+    def records(self, first: int, end: int) -> List[Tuple[int, int, int, int, int, int]]:
+        offset = self.data_offset + first * RECORD.size
+        return list(RECORD.iter_unpack(self.map[offset:offset + (end - first) * RECORD.size]))
+
+
+class HandHistoryReader:
+    """
+    Read access to the segments a HandHistoryWriter left in directory. Opening
+    indexes every hand by scanning the kind byte of each record, after which
+    hands can be iterated or fetched by position in O(1).
+    """
+
+    def __init__(self, directory: str, prefix: str = "hands"):
+        self.segments = [_Segment(path) for path in segment_paths(directory, prefix)]
+        self._index = [(segment, first, end) for segment in self.segments for first, end in segment.hand_spans()]
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, position: int) -> HandRecord:
+        segment, first, end = self._index[position]
+        return _decode(segment.records(first, end), segment.names)
+
+    def __iter__(self) -> Iterator[HandRecord]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def close(self):
+        for segment in self.segments:
+            segment.map.close()
+
+    def __enter__(self) -> "HandHistoryReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _decode(records: List[Tuple[int, int, int, int, int, int]], names: List[str]) -> HandRecord:
+    _, num_seats, button, _, big_blind, hand_number = records[0]
+    seats = records[1:1 + num_seats]
+    return HandRecord(
+        hand_number=hand_number,
+        button=button,
+        big_blind=big_blind,
+        names=names,
+        stacks=[y for _, _, _, _, _, y in seats],
+        statuses=[_STATUSES[x] for _, _, _, _, x, _ in seats],
+        hole_cards=[(a, b) for _, _, a, b, _, _ in seats],
+        records=records[1 + num_seats:],
+    )
+
+
+def replay_hand(hand: HandRecord, players: Optional[List[Player]] = None,
+                sink: Optional[EventSink] = None) -> PokerGame:
+    """
+    Plays a recorded hand again on a fresh PokerGame, dealing the same cards and
+    making the same player_action and advance_game_phase calls, and returns the
+    game after the last recorded action. The players are plain Players named as
+    recorded unless given; their stacks are set to the recorded ones.
+    """
+    if players is None:
+        players = [Player(name, stack) for name, stack in zip(hand.names, hand.stacks)]
+    for player, stack in zip(players, hand.stacks):
+        player.stack = stack
+    game = PokerGame(players, hand.big_blind, game_number=hand.hand_number - 1,
+                     sink=sink if sink is not None else NullSink())
+    # start_new_hand moves the button on by one seat
+    game.button_position = (hand.button - 1) % len(players)
+    game.deck.preset(hand.deal_order)
+    game.start_new_hand()
+
+    for kind, seat, a, b, x, y in hand.records:
+        if kind == ACTION:
+            if seat != game.active_player_index:
+                raise ValueError(f"Hand {hand.hand_number}: seat {seat} acted out of turn "
+                                 f"(seat {game.active_player_index} was to act)")
+            if not game.player_action(_ACTIONS[b >> 4], x):
+                raise ValueError(f"Hand {hand.hand_number}: recorded action of seat {seat} was rejected")
+        elif kind == ADVANCE and game.phase == _PHASES[a]:
+            # Advances made by player_action itself have already happened; the
+            # phase still matching means the caller advanced the game directly
+            game.advance_game_phase()
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--prefix", default="hands")
+    parser.add_argument("--hand", type=int, help="position of a hand to replay on the console")
+    args = parser.parse_args()
+
+    with HandHistoryReader(args.directory, args.prefix) as reader:
+        if args.hand is not None:
+            replay_hand(reader[args.hand], sink=ConsoleSink())
+            return
+        for position, hand in enumerate(reader):
+            winners = ", ".join(f"{hand.names[seat]} +{amount}" for seat, amount, _ in hand.wins)
+            print(f"{position:>7} hand {hand.hand_number:<6} {len(hand.actions):>3} actions  "
+                  f"{'abandoned' if not hand.complete else winners}")
+        print(f"{len(reader)} hands in {len(reader.segments)} segments")
+
+
+if __name__ == "__main__":
+    main()
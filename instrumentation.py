@@ -0,0 +1,363 @@
+"""
+Where does the time go in a match? Instruments attached to a PokerGame record
+per-bot decision latency histograms, inclusive timings of the engine's main
+steps, and evaluator call counts along with the number of hands each entry
+point scored. Detached, the game pays nothing for them.
+
+The simulation can also be run under cProfile, or under a signal based
+sampling profiler that writes collapsed stacks for flamegraph tools.
+
+    python instrumentation.py --hands 500
+    python instrumentation.py --hands 500 --profile sampling --output sim.folded
+    python instrumentation.py --hands 500 --profile cprofile --output sim.prof
+"""
+import argparse
+import cProfile
+import signal
+import sys
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+from typing import Callable, Dict, List
+from equity import EquityEstimator
+from events import NullSink
+from exact_equity import exact_equity
+from game import PokerGame
+from hand_evaluator import HandEvaluator
+from my_players import PokerBot
+from player import Player
+from simulation import play_hand
+
+# Engine methods timed by attach(); each timing includes the calls it makes
+TIMED_METHODS = ("get_game_state", "player_action", "advance_game_phase", "_showdown")
+# HandEvaluator entry points whose calls are counted. The engine scores showdowns
+# with score_holdings, and the exact equity paths use evaluate_key.
+COUNTED_EVALUATOR_METHODS = ("evaluate_hand", "evaluate_strength", "evaluate_indices", "evaluate_mask",
+                             "evaluate_key", "score_holdings")
+# Modules that call exact_equity by name, whose reference is swapped for a counting one
+EXACT_EQUITY_CALLERS = ("exact_equity", "ranges", "my_players")
+
+
+def _one_hand(args: tuple, kwargs: dict, result) -> int:
+    return 1
+
+
+def _holdings_scored(args: tuple, kwargs: dict, result) -> int:
+    return len(result)
+
+
+def _sampled_hands(args: tuple, kwargs: dict, result) -> int:
+    # Every sample scores the hand and each opponent's, mostly with table lookups
+    # that never go through HandEvaluator
+    opponents = args[3] if len(args) > 3 else kwargs.get("num_opponents", 1)
+    return result.samples * (max(1, opponents) + 1)
+
+
+def _compared_hands(args: tuple, kwargs: dict, result) -> int:
+    # Opponent hands are looked up inline; the hand's own go through evaluate_key
+    return result.samples
+
+
+# Attached Instruments. The evaluator entry points are wrapped once, while this
+# is not empty, and the wrappers count for every Instruments in it.
+_COUNTING: List["Instruments"] = []
+# (owner, attribute) -> (original, wrapper) of the installed wrappers
+_INSTALLED: Dict[tuple, tuple] = {}
+
+
+def _counted(name: str, function: Callable, hands: Callable = _one_hand) -> Callable:
+    """Wraps function to count its calls, and the hands(args, kwargs, result) each call scored."""
+
+    @wraps(function)
+    def counted(*args, **kwargs):
+        result = function(*args, **kwargs)
+        scored = hands(args, kwargs, result)
+        for instruments in _COUNTING:
+            instruments.evaluator_calls[name] += 1
+            instruments.hands_evaluated[name] += scored
+        return result
+
+    return counted
+
+
+def _install(owner, name: str, original, wrapper):
+    _INSTALLED[owner, name] = original, wrapper
+    setattr(owner, name, wrapper)
+
+
+def _install_counters():
+    for name in COUNTED_EVALUATOR_METHODS:
+        original = HandEvaluator.__dict__[name]
+        hands = _holdings_scored if name == "score_holdings" else _one_hand
+        _install(HandEvaluator, name, original, staticmethod(_counted(name, original.__func__, hands)))
+
+    counted_exact_equity = _counted("exact_equity", exact_equity, _compared_hands)
+    for module_name in EXACT_EQUITY_CALLERS:
+        module = sys.modules.get(module_name)
+        if module is not None and getattr(module, "exact_equity", None) is exact_equity:
+            _install(module, "exact_equity", exact_equity, counted_exact_equity)
+
+    original_estimate = EquityEstimator.__dict__["estimate"]
+    counted_estimate = _counted("equity.estimate", original_estimate, _sampled_hands)
+
+    @wraps(original_estimate)
+    def estimate(estimator, *args, **kwargs):
+        start = time.perf_counter()
+        result = counted_estimate(estimator, *args, **kwargs)
+        seconds = time.perf_counter() - start
+        for instruments in _COUNTING:
+            instruments.engine["equity.estimate"].record(seconds)
+            instruments.equity_samples += result.samples
+        return result
+
+    _install(EquityEstimator, "estimate", original_estimate, estimate)
+
+
+def _uninstall_counters():
+    for (owner, name), (original, wrapper) in _INSTALLED.items():
+        # Anything patched over a wrapper since is someone else's to undo
+        if vars(owner).get(name) is wrapper:
+            setattr(owner, name, original)
+    _INSTALLED.clear()
+
+
+class LatencyHistogram:
+    """
+    Latencies in power-of-two microsecond buckets: bucket k holds values below
+    2**k microseconds (bucket 0 is below 1us), so percentiles are read with a
+    resolution of a factor of two.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * 40
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.buckets[min(int(seconds * 1e6).bit_length(), 39)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound in seconds of the bucket holding the given fraction of the values."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for k, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min((1 << k) * 1e-6, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "total": self.total, "mean": self.mean, "max": self.max,
+                "p50": self.percentile(0.5), "p99": self.percentile(0.99), "buckets": self.buckets}
+
+
+class Instruments:
+    """
+    Measurements for one or more PokerGames. attach() wraps the timed engine
+    methods on the game instance and counts HandEvaluator, EquityEstimator and
+    exact_equity calls process-wide until detach(); while several Instruments
+    are attached, every call counts for each of them. Hands scored inside an
+    equity call count for that call, and also for any HandEvaluator method it
+    goes through.
+    """
+
+    def __init__(self):
+        self.decisions: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)  # by player name
+        self.decisions_by_phase: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.engine: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)  # by method name
+        self.evaluator_calls = Counter()
+        self.hands_evaluated = Counter()  # by evaluator entry point, as evaluator_calls
+        self.equity_samples = 0
+        self._games = []
+
+    def record_decision(self, name: str, phase: str, seconds: float):
+        self.decisions[name].record(seconds)
+        self.decisions_by_phase[phase].record(seconds)
+
+    def _timed(self, name: str, method: Callable) -> Callable:
+        histogram = self.engine[name]
+        clock = time.perf_counter
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+
+        return timed
+
+    def attach(self, game: PokerGame):
+        if game.instruments is not None and game.instruments is not self:
+            raise ValueError("The game is already attached to other Instruments")
+        if game.instruments is None:
+            for name in TIMED_METHODS:
+                setattr(game, name, self._timed(name, getattr(game, name)))
+            game.instruments = self
+            self._games.append(game)
+        if self not in _COUNTING:
+            _COUNTING.append(self)
+            if len(_COUNTING) == 1:
+                _install_counters()
+
+    def detach(self):
+        for game in self._games:
+            for name in TIMED_METHODS:
+                delattr(game, name)
+            game.instruments = None
+        self._games.clear()
+        if self in _COUNTING:
+            _COUNTING.remove(self)
+            if not _COUNTING:
+                _uninstall_counters()
+
+    def __enter__(self) -> "Instruments":
+        return self
+
+    def __exit__(self, *exc):
+        self.detach()
+
+    def to_dict(self) -> dict:
+        return {
+            "decisions": {name: histogram.to_dict() for name, histogram in self.decisions.items()},
+            "decisions_by_phase": {phase: histogram.to_dict() for phase, histogram in self.decisions_by_phase.items()},
+            "engine": {name: histogram.to_dict() for name, histogram in self.engine.items()},
+            "evaluator_calls": dict(self.evaluator_calls),
+            "hands_evaluated": dict(self.hands_evaluated),
+            "equity_samples": self.equity_samples,
+        }
+
+    def report(self) -> str:
+        lines = [f"{'':<28} {'count':>8} {'total':>9} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}"]
+
+        def add(title: str, histograms: Dict[str, LatencyHistogram]):
+            lines.append(title)
+            for name, histogram in sorted(histograms.items()):
+                lines.append(f"  {name:<26} {histogram.count:>8} {histogram.total:>8.3f}s "
+                             f"{_format_time(histogram.mean):>9} {_format_time(histogram.percentile(0.5)):>9} "
+                             f"{_format_time(histogram.percentile(0.99)):>9} {_format_time(histogram.max):>9}")
+
+        add("Decision latency by player", self.decisions)
+        add("Decision latency by phase", self.decisions_by_phase)
+        add("Engine (inclusive)", self.engine)
+        lines.append(f"Evaluator calls {'':<12} {'calls':>8} {'hands':>9}")
+        for name, count in sorted(self.evaluator_calls.items()):
+            lines.append(f"  {name:<26} {count:>8} {self.hands_evaluated[name]:>9}")
+        if self.equity_samples:
+            lines.append(f"  {'equity samples':<26} {self.equity_samples:>8}")
+        return "\n".join(lines)
+
+
+def _format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    return f"{seconds * 1e3:.2f}ms"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of the main thread every interval seconds of CPU
+    time (SIGPROF, so Unix only) and counts identical stacks. dump() writes them
+    in the collapsed "frame;frame;frame count" format read by flamegraph.pl,
+    speedscope and similar tools.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        if not hasattr(signal, "SIGPROF"):
+            raise RuntimeError("The sampling profiler needs SIGPROF, use cProfile on this platform")
+        self.interval = interval
+        self.stacks = Counter()
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def profile(fn: Callable, mode: str, output: str, interval: float = 0.001):
+    """Runs fn() under cProfile (mode "cprofile", pstats output) or the sampling profiler (mode "sampling")."""
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fn)
+        profiler.dump_stats(output)
+        return result
+    if mode == "sampling":
+        with SamplingProfiler(interval) as profiler:
+            result = fn()
+        profiler.dump(output)
+        return result
+    raise ValueError(f"Unknown profiler {mode!r}, expected 'cprofile' or 'sampling'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hands", type=int, default=500)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--stack", type=int, default=1000)
+    parser.add_argument("--big-blind", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", choices=["cprofile", "sampling"], help="also run under a profiler")
+    parser.add_argument("--interval", type=float, default=0.001, help="sampling profiler interval in seconds")
+    parser.add_argument("--output", help="profile output file")
+    args = parser.parse_args()
+
+    players: List[Player] = [PokerBot(f"Bot {i + 1}", args.stack, verbose=False) for i in range(args.players)]
+    game = PokerGame(players, big_blind=args.big_blind, sink=NullSink(), seed=args.seed, history_hands=100)
+    instruments = Instruments()
+    instruments.attach(game)
+
+    def run():
+        for _ in range(args.hands):
+            for player in players:
+                player.stack = args.stack
+            play_hand(game)
+
+    start = time.perf_counter()
+    with instruments:
+        if args.profile:
+            output = args.output or ("simulation.prof" if args.profile == "cprofile" else "simulation.folded")
+            profile(run, args.profile, output, args.interval)
+            print(f"Profile written to {output}", file=sys.stderr)
+        else:
+            run()
+    print(f"{args.hands} hands in {time.perf_counter() - start:.2f}s\n")
+    print(instruments.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+# A suit isomorphism class: one (hole rank mask, board rank mask) pair per suit,
+# sorted so that relabelling the suits does not change it.
+IsomorphismKey = Tuple[Tuple[int, int], ...]
+
+
+def canonical_key(hole_cards: List[int], community_cards: List[int]) -> IsomorphismKey:
+    """
+    Maps hole and community card indices (as returned by Card.get_index(), 0 entries
+    ignored) to a key shared by every (hole, board) pair that only differs by a suit
+    permutation and by the order of the cards within the hole or the board.
+    """
+    hole_masks = [0, 0, 0, 0]
+    board_masks = [0, 0, 0, 0]
+    for card in hole_cards:
+        if card:
+            hole_masks[(card - 1) // 13] |= 1 << ((card - 1) % 13)
+    for card in community_cards:
+        if card:
+            board_masks[(card - 1) // 13] |= 1 << ((card - 1) % 13)
+    return tuple(sorted(zip(hole_masks, board_masks), reverse=True))
+
+
+def representative(key: IsomorphismKey) -> Tuple[List[int], List[int]]:
+    """Returns canonical hole and community card indices for a key, using suit i for its i-th entry."""
+    hole_cards = []
+    community_cards = []
+    for suit, (hole_mask, board_mask) in enumerate(key):
+        for rank in range(13):
+            if hole_mask >> rank & 1:
+                hole_cards.append(suit * 13 + rank + 1)
+            if board_mask >> rank & 1:
+                community_cards.append(suit * 13 + rank + 1)
+    return hole_cards, community_cards
+
+
+class IsomorphicCache:
+    """
+    Bounded LRU memo for fn(hole_cards, community_cards, *args), where fn gives the
+    same answer for suit-isomorphic inputs (hand strength, equity, ...). fn is only
+    ever called with the canonical representative of a class, so every spot in the
+    class is a dict lookup after the first.
+    """
+
+    def __init__(self, fn: Callable, maxsize: int = 1 << 16):
+        self.fn = fn
+
+        @lru_cache(maxsize=maxsize)
+        def compute(key: IsomorphismKey, *args):
+            hole_cards, community_cards = representative(key)
+            return fn(hole_cards, community_cards, *args)
+
+        self._compute = compute
+
+    def __call__(self, hole_cards: List[int], community_cards: List[int], *args):
+        return self._compute(canonical_key(hole_cards, community_cards), *args)
+
+    @property
+    def hits(self) -> int:
+        return self._compute.cache_info().hits
+
+    @property
+    def misses(self) -> int:
+        return self._compute.cache_info().misses
+
+    def cache_info(self):
+        return self._compute.cache_info()
+
+    def cache_clear(self):
+        self._compute.cache_clear()
@@ -1,33 +1,152 @@
 from player import Player, PlayerAction
 from card import Card
+from equity import EquityEstimator
+from exact_equity import exact_equity
+from isomorphism import IsomorphicCache
+from preflop import preflop_equity
+from ranges import Range, range_equity
+from game_state import HOLE_CARDS, COMMUNITY_CARDS, CURRENT_BET, ACTIVE_PLAYER, NUM_PLAYERS, STACKS, game_number_offset
+from collections import Counter, defaultdict
 import random
+
+# Betting round by number of community cards
+_PHASES = {0: 'pre-flop', 3: 'flop', 4: 'turn', 5: 'river'}
+
+
+def _postflop_strength(hole_cards, community_cards):
+    """Post-flop hand evaluation with better risk assessment."""
+    all_cards = sorted(hole_cards + community_cards)
+
+    ranks = [((i -1)% 13) + 2 if (i % 13) != 0 else 14 for i in all_cards]
+
+    suits = [(i-1) // 13 for i in all_cards]
+
+    def is_flush():
+        return max(suits.count(suit) for suit in set(suits)) >= 5
+
+    def is_straight():
+        unique_ranks = sorted(set(ranks))
+        return any(unique_ranks[i + 4] - unique_ranks[i] == 4 for i in range(len(unique_ranks) - 4))
+
+    def is_flush_draw():
+        return max(suits.count(suit) for suit in set(suits)) == 4  # Flush draw (4 same suits)
+
+    def is_straight_draw():
+        unique_ranks = sorted(set(ranks))
+        return any(unique_ranks[i + 3] - unique_ranks[i] == 3 for i in range(len(unique_ranks) - 3))
+
+    rank_counts = {rank: ranks.count(rank) for rank in set(ranks)}
+    pairs = [rank for rank, count in rank_counts.items() if count == 2]
+    three_of_a_kinds = [rank for rank, count in rank_counts.items() if count == 3]
+    four_of_a_kinds = [rank for rank, count in rank_counts.items() if count == 4]
+
+    # Stronger weighting for draws
+    if is_flush() and is_straight():
+        return 1.0  # Straight flush
+    elif four_of_a_kinds:
+        return 0.95  # Four of a kind
+    elif three_of_a_kinds and pairs:
+        return 0.9  # Full house
+    elif is_flush():
+        return 0.85  # Flush
+    elif is_straight():
+        return 0.8  # Straight
+    elif three_of_a_kinds:
+        return 0.75  # Three of a kind
+    elif len(pairs) >= 2:
+        return 0.65  # Two pair
+    elif pairs:
+        return 0.55  # One pair
+    elif is_flush_draw() or is_straight_draw():
+        return 0.5  # Strong draws
+    else:
+        return 0.3  # High card
+
+
+# Largest range equity spot PokerBot enumerates: a turn against any holding
+_RANGE_EXACT_LIMIT = 50_000
+
+
 class PokerBot(Player):
-    def __init__(self, name, stack):
+    def __init__(self, name, stack, verbose=True):
         super().__init__(name, stack)
+        self.verbose = verbose  # print reasoning while deciding
         self.initial_stack=self.stack
         self.opponent_actions = {'raise': 0, 'call': 0, 'fold': 0, 'check': 0}
         self.opponent_stacks = {}
         self.total_opponent_actions = 0
-
-    def update_opponent_behavior(self, action, game_state):
-        """Update opponent behavior and correctly track opponent stacks from game_state."""
-
-        if action[2] in self.opponent_actions:
-            self.opponent_actions[action[2]] += 1
+        # Per-seat action counts, and which opponents left or shoved in the current hand
+        self.seat_actions = defaultdict(Counter)
+        self.current_hand = 0
+        self.folded_seats = set()
+        self.all_in_seats = set()
+        self.reset_equity_state()
+
+    def reset_equity_state(self):
+        """
+        Gives the bot its own equity estimator and cache. Nothing is shared with
+        other bots, so a bot's decisions only depend on its own hands and on the
+        global random generator, and bots at different tables can run on
+        different threads. Samples stop on a sample count or an error target
+        rather than a clock, so seeded matches replay.
+        """
+        self.equity_estimator = EquityEstimator(time_budget=None)
+        # Keyed by suit isomorphism class, so a spot this bot has seen before costs a dict lookup
+        self.equity_cache = IsomorphicCache(self._equity)
+
+    def __getstate__(self):
+        # Copies, such as a ProcessRunner worker's, start with empty equity state
+        state = {name: getattr(self, name) for name in Player.__slots__}
+        state.update(self.__dict__)
+        del state["equity_estimator"], state["equity_cache"]
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.reset_equity_state()
+
+    def observe_actions(self, seat, events):
+        """Fold the actions since our last decision into the opponent model."""
+        for event in events:
+            if event.hand_number != self.current_hand:
+                self.start_hand(event.hand_number)
+            if event.seat != seat:
+                self.update_opponent_behavior(event)
+
+    def start_hand(self, hand_number):
+        self.current_hand = hand_number
+        self.folded_seats.clear()
+        self.all_in_seats.clear()
+
+    def update_opponent_behavior(self, event):
+        """Update opponent behavior with a single opponent action."""
+        action = event.action.value
+        self.log(f"Updating behavior: seat {event.seat} {action} {event.amount}")
+        self.seat_actions[event.seat][action] += 1
+        if action in self.opponent_actions:
+            self.opponent_actions[action] += 1
             self.total_opponent_actions += 1
 
-        opponent_name = action[1]  # Extract opponent name
-
-        # Extract opponent index from game_state
-        active_player_index = game_state[10]  # Index of current active player
-        num_players = game_state[11]  # Total players
-
-        # Assuming player order is fixed, derive opponent index
-        opponent_index = (active_player_index + num_players - 1) % num_players  # Previous player
-        opponent_stack = game_state[13 + opponent_index]  # Get opponent stack from game_state
-
-        # Store opponent stack
-        self.opponent_stacks[opponent_name] = opponent_stack
+        if event.action == PlayerAction.FOLD:
+            self.folded_seats.add(event.seat)
+        elif event.action == PlayerAction.ALL_IN:
+            self.all_in_seats.add(event.seat)
+
+    def count_opponents(self, game_state):
+        """Opponents still in the current hand: not folded, and either holding chips or all-in."""
+        own_seat = game_state[ACTIVE_PLAYER]
+        count = 0
+        for seat in range(game_state[NUM_PLAYERS]):
+            if seat == own_seat or seat in self.folded_seats:
+                continue
+            if game_state[STACKS + seat] > 0 or seat in self.all_in_seats:
+                count += 1
+        return max(count, 1)
+
+    def log(self, *args):
+        if self.verbose:
+            print(*args)
 
     def get_opponent_tendency(self):
         """Determine opponent's tendencies based on action history and remaining stack."""
@@ -54,126 +173,87 @@ class PokerBot(Player):
         else:
             return "neutral"
 
-    def evaluate_preflop(self, hole_cards):
-        """Improved Pre-flop hand strength evaluation."""
-        ranks = [((i-1) % 13) + 1 if (i % 13) != 0 else 14 for i in hole_cards]
-
-        suits = [(i-1) // 13 for i in hole_cards]
-
-
-        is_pair = (ranks[0] == ranks[1])
-        is_suited = (suits[0] == suits[1])
-        is_connected = (abs(ranks[0] - ranks[1]) == 1)
-
-        # More aggressive betting on stronger hands
-        if is_pair:
-            return 0.7 if ranks[0] >= 10 else 0.6 if ranks[0] >= 7 else 0.55  # Pocket pairs strong to weak
-        if is_suited and is_connected:
-            return 0.85 if ranks[0] >= 10 else 0.75  # High suited connectors
-        if is_suited or is_connected:
-            return 0.65 if ranks[0] >= 10 else 0.6  # High Suited or Connected Cards
-        if ranks[0] >= 12:
-            return 0.4  # High-card hands (AQ, KJ, etc.)
-        return 0.3  # Weak hands
-
-    def evaluate_flop(self, hole_cards, community_cards):
-        return self.evaluate_postflop(hole_cards, community_cards[:3])
-
-    def evaluate_turn(self, hole_cards, community_cards):
-        return self.evaluate_postflop(hole_cards, community_cards[:4])
-
-    def evaluate_river(self, hole_cards, community_cards):
-        return self.evaluate_postflop(hole_cards, community_cards)
-
-    
+    def evaluate_preflop(self, hole_cards, num_opponents=1):
+        """Pre-flop all-in equity against num_opponents random hands, from the precomputed table."""
+        return preflop_equity(hole_cards[0], hole_cards[1], num_opponents)
+
+    def evaluate_flop(self, hole_cards, community_cards, num_opponents=1):
+        return self.evaluate_equity(hole_cards, community_cards[:3], num_opponents)
+
+    def evaluate_turn(self, hole_cards, community_cards, num_opponents=1):
+        return self.evaluate_equity(hole_cards, community_cards[:4], num_opponents)
+
+    def evaluate_river(self, hole_cards, community_cards, num_opponents=1):
+        return self.evaluate_equity(hole_cards, community_cards, num_opponents)
+
+    def evaluate_equity(self, hole_cards, community_cards, num_opponents):
+        """Monte Carlo share of the pot against num_opponents random hands."""
+        equity = self.equity_cache(hole_cards, community_cards, num_opponents)
+        self.log(f"Equity: {equity:.3f}")
+        return equity
+
+    def evaluate_range_equity(self, hole_cards, community_cards, villain_range):
+        """
+        Heads-up all-in equity against an opponent range, a ranges.Range or range
+        text such as "top 15%". Exact on the turn and river, sampled otherwise.
+        """
+        estimate = range_equity(Range.holding(hole_cards[0], hole_cards[1]), villain_range, community_cards,
+                                exact_limit=_RANGE_EXACT_LIMIT, max_samples=1000, target_error=0.03)
+        self.log(f"Equity against {villain_range}: {estimate.equity:.3f}")
+        return estimate.equity
+
+    def _equity(self, hole_cards, community_cards, num_opponents):
+        # Heads-up on the river, enumerating every opponent holding is both exact and
+        # quicker than sampling
+        if num_opponents <= 1 and len(community_cards) == 5:
+            return exact_equity(hole_cards, community_cards).equity
+        return self.equity_estimator.estimate(hole_cards, community_cards, num_opponents).equity
+
+    def cache_stats(self):
+        """Hit/miss counters of the bot's equity cache."""
+        return {"equity": self.equity_cache.cache_info()}
 
     def evaluate_postflop(self, hole_cards, community_cards):
         """Post-flop hand evaluation with better risk assessment."""
-        all_cards = sorted(hole_cards + community_cards)
-
-        ranks = [((i -1)% 13) + 2 if (i % 13) != 0 else 14 for i in all_cards]
-
-        suits = [(i-1) // 13 for i in all_cards]
-
-        def is_flush():
-            return max(suits.count(suit) for suit in set(suits)) >= 5
-
-        def is_straight():
-            unique_ranks = sorted(set(ranks))
-            return any(unique_ranks[i + 4] - unique_ranks[i] == 4 for i in range(len(unique_ranks) - 4))
-
-        def is_flush_draw():
-            return max(suits.count(suit) for suit in set(suits)) == 4  # Flush draw (4 same suits)
-
-        def is_straight_draw():
-            unique_ranks = sorted(set(ranks))
-            return any(unique_ranks[i + 3] - unique_ranks[i] == 3 for i in range(len(unique_ranks) - 3))
-
-        rank_counts = {rank: ranks.count(rank) for rank in set(ranks)}
-        pairs = [rank for rank, count in rank_counts.items() if count == 2]
-        three_of_a_kinds = [rank for rank, count in rank_counts.items() if count == 3]
-        four_of_a_kinds = [rank for rank, count in rank_counts.items() if count == 4]
-
-        # Stronger weighting for draws
-        if is_flush() and is_straight():
-            return 1.0  # Straight flush
-        elif four_of_a_kinds:
-            return 0.95  # Four of a kind
-        elif three_of_a_kinds and pairs:
-            return 0.9  # Full house
-        elif is_flush():
-            return 0.85  # Flush
-        elif is_straight():
-            return 0.8  # Straight
-        elif three_of_a_kinds:
-            return 0.75  # Three of a kind
-        elif len(pairs) >= 2:
-            return 0.65  # Two pair
-        elif pairs:
-            return 0.55  # One pair
-        elif is_flush_draw() or is_straight_draw():
-            return 0.5  # Strong draws
-        else:
-            return 0.3  # High card
+        return _postflop_strength(hole_cards, community_cards)
 
     def decide_action(self, game_state, action_history):
         """More aggressive decision-making based on improved hand evaluation and opponent moves."""
-        hole_cards = game_state[:2]
-        community_cards = [card for card in game_state[2:7] if card != 0]
-        phase = action_history[-1][0] if action_history else "pre-flop" 
-        current_raise = game_state[8]
+        hole_cards = game_state[HOLE_CARDS:HOLE_CARDS + 2]
+        community_cards = [card for card in game_state[COMMUNITY_CARDS:COMMUNITY_CARDS + 5] if card != 0]
+        phase = _PHASES[len(community_cards)]
+        current_raise = game_state[CURRENT_BET]
+        num_players = game_state[NUM_PLAYERS]
+        hand_number = game_state[game_number_offset(num_players)]
+        if hand_number != self.current_hand:
+            self.start_hand(hand_number)
+        for seat in self.seat_actions:
+            self.opponent_stacks[seat] = game_state[STACKS + seat]
+        num_opponents = self.count_opponents(game_state)
         strength = 0.5
-        updated_opponents = set()  # Track updated opponents to prevent redundant calls
-
-        for action in list(action_history): 
-            if action[1] != self.name and action[1] not in updated_opponents:
-                print(f"Updating behavior: {action[1]} {action[2]} {action[3]}")
-                self.update_opponent_behavior(action, game_state)
-                updated_opponents.add(action[1])  # Ensure each opponent is updated only once
-
 
         opponent_tendency = self.get_opponent_tendency()
-        print("Opponent Tendency:", opponent_tendency)
+        self.log("Opponent Tendency:", opponent_tendency)
 
         if phase =='pre-flop' :
-            print(1)
-            strength = self.evaluate_preflop(hole_cards)
+            self.log(1)
+            strength = self.evaluate_preflop(hole_cards, num_opponents)
         elif phase == 'flop':
-            print(2)
-            strength = self.evaluate_flop(hole_cards, community_cards)
+            self.log(2)
+            strength = self.evaluate_flop(hole_cards, community_cards, num_opponents)
         elif phase == 'turn':
-            print(3)
-            strength = self.evaluate_turn(hole_cards, community_cards)
+            self.log(3)
+            strength = self.evaluate_turn(hole_cards, community_cards, num_opponents)
         elif phase == 'river':
-            print(4)
-            strength = self.evaluate_river(hole_cards, community_cards)
+            self.log(4)
+            strength = self.evaluate_river(hole_cards, community_cards, num_opponents)
 
-        print(f"Hand strength: {strength}")
+        self.log(f"Hand strength: {strength}")
 
         # More risk-taking: Increased all-in frequencies
         if random.randint(1,10)==7:
             return PlayerAction.ALL_IN,self.stack
-        elif game_state[8] > self.stack and strength > 0.8:
+        elif game_state[CURRENT_BET] > self.stack and strength > 0.8:
             return PlayerAction.ALL_IN, self.stack
         elif phase == 'river' and strength > 0.8:
             return PlayerAction.ALL_IN, self.stack
@@ -189,13 +269,13 @@ class PokerBot(Player):
                     else:
                         return PlayerAction.RAISE, min(50, self.stack)
                 else:
-                    return PlayerAction.CALL, game_state[8]
+                    return PlayerAction.CALL, game_state[CURRENT_BET]
             else:
-                return PlayerAction.CALL, game_state[8]
+                return PlayerAction.CALL, game_state[CURRENT_BET]
         elif strength > 0.5:
-            return PlayerAction.CALL, game_state[8]
+            return PlayerAction.CALL, game_state[CURRENT_BET]
         else:
-            return (PlayerAction.CALL, game_state[8]) if opponent_tendency == 'loose' else (PlayerAction.FOLD, 0)
+            return (PlayerAction.CALL, game_state[CURRENT_BET]) if opponent_tendency == 'loose' else (PlayerAction.FOLD, 0)
 
 
     def action(self, game_state, action_history):
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Tuple, Optional
+from typing import List, NamedTuple, Sequence, Tuple, Optional
 from dataclasses import dataclass
 from card import Card
 
@@ -13,6 +13,14 @@ class PlayerAction(Enum):
     ALL_IN = "all-in"
 
 
+class ActionEvent(NamedTuple):
+    hand_number: int
+    seat: int
+    phase: str
+    action: PlayerAction
+    amount: int
+
+
 class PlayerStatus(Enum):
     ACTIVE = "active"
     FOLDED = "folded"
@@ -20,7 +28,7 @@ class PlayerStatus(Enum):
     OUT = "out"
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     name: str
     stack: int
@@ -39,7 +47,7 @@ class Player:
         self.bet_amount = 0
 
     def can_make_action(self) -> bool:
-        return self.status in [PlayerStatus.ACTIVE]
+        return self.status is PlayerStatus.ACTIVE
 
     def take_action(self, action: PlayerAction, amount: int = 0) -> Tuple[PlayerAction, int]:
         if action == PlayerAction.FOLD:
@@ -51,10 +59,11 @@ class Player:
             self.stack -= max_bet
             self.bet_amount += max_bet
             if self.stack == 0:
+                self.status = PlayerStatus.ALL_IN
                 return PlayerAction.ALL_IN, max_bet
             return PlayerAction.CALL, max_bet
 
-        if action in [PlayerAction.BET, PlayerAction.RAISE]:
+        if action in (PlayerAction.BET, PlayerAction.RAISE):
             # Calculate maximum possible bet
             max_bet = min(amount, self.stack)
             delta = max_bet - self.bet_amount
@@ -86,10 +95,22 @@ class Player:
 
         return action, 0
 
-    def action(self, game_state: list[int], action_history: list) -> Tuple[PlayerAction, int]:
+    def observe_actions(self, seat: int, events: List[ActionEvent]):
+        """
+        Called right before action() with every action taken at the table since
+        this player's previous decision, oldest first.
+
+        Parameters:
+            seat: this player's seat
+            events: the new actions, including this player's own
+        """
+        pass
+
+    def action(self, game_state: Sequence[int], action_history: list) -> Tuple[PlayerAction, int]:
         """
         Parameters:
-            game_state: a numerical representation of the game state
+            game_state: a read-only numerical representation of the game state,
+                see game_state.py for the field offsets
             action_history: a list of actions taken in sequence
 
         Returns:
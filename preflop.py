@@ -0,0 +1,71 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Bump whenever the file layout or the way the equities are computed changes
+TABLE_VERSION = 1
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "preflop_equity.json")
+MAX_OPPONENTS = 9
+
+_RANK_SYMBOLS = "23456789TJQKA"
+
+# Loaded on first lookup: hand class -> equities against 1..MAX_OPPONENTS opponents
+_TABLE: Optional[Dict[str, List[float]]] = None
+
+
+def _rank_and_suit(index: int) -> Tuple[int, int]:
+    """Decodes a Card.get_index() value into (rank 2-14, suit 0-3)."""
+    return (index - 1) % 13 + 2, (index - 1) // 13
+
+
+def hand_class(card1: int, card2: int) -> str:
+    """
+    Returns the canonical starting hand class of two hole card indices,
+    e.g. "AA", "AKs" or "T9o", with the higher rank first.
+    """
+    rank1, suit1 = _rank_and_suit(card1)
+    rank2, suit2 = _rank_and_suit(card2)
+    high, low = max(rank1, rank2), min(rank1, rank2)
+    name = _RANK_SYMBOLS[high - 2] + _RANK_SYMBOLS[low - 2]
+    if high == low:
+        return name
+    return name + ("s" if suit1 == suit2 else "o")
+
+
+def hand_classes() -> List[str]:
+    """All 169 starting hand classes: pairs, then suited, then offsuit hands, strongest ranks first."""
+    ranks = _RANK_SYMBOLS[::-1]
+    pairs = [rank + rank for rank in ranks]
+    suited = [high + low + "s" for i, high in enumerate(ranks) for low in ranks[i + 1:]]
+    offsuit = [high + low + "o" for i, high in enumerate(ranks) for low in ranks[i + 1:]]
+    return pairs + suited + offsuit
+
+
+def class_cards(name: str) -> Tuple[int, int]:
+    """Returns one representative pair of card indices for a hand class."""
+    high = _RANK_SYMBOLS.index(name[0]) + 1
+    low = _RANK_SYMBOLS.index(name[1]) + 1
+    if len(name) == 3 and name[2] == "s":
+        return high, low
+    return high, 13 + low
+
+
+def load_table(path: str = TABLE_PATH) -> Dict[str, List[float]]:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != TABLE_VERSION:
+        raise ValueError(f"{path} has table version {data.get('version')}, expected {TABLE_VERSION}. "
+                         "Rebuild it with build_preflop_table.py")
+    return data["equity"]
+
+
+def preflop_equity(card1: int, card2: int, num_opponents: int = 1) -> float:
+    """
+    All-in equity of two hole card indices against num_opponents random hands.
+    The table is read from disk on the first call.
+    """
+    global _TABLE
+    if _TABLE is None:
+        _TABLE = load_table()
+    num_opponents = min(max(num_opponents, 1), MAX_OPPONENTS)
+    return _TABLE[hand_class(card1, card2)][num_opponents - 1]
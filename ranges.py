@@ -0,0 +1,455 @@
+"""
+Hand ranges and range-vs-range all-in equity.
+
+A Range gives a weight to each of the 1326 two card holdings. Ranges are
+written as comma separated terms, later terms overriding earlier ones:
+
+    top 15%           the strongest hand classes by pre-flop equity, about 15% of the holdings
+    AA, AKs, T9o, AK  hand classes (AK is both the suited and the offsuit holdings)
+    QQ+, A9s+, KTo+   a pair and every higher pair, or a kicker and every higher kicker
+    22-66, A2s-A5s    spans of pairs or of kickers
+    AhKh              a single holding
+    KQo:0.5           any term followed by :weight (1 by default)
+
+Equity is computed against holdings that share no card with the board, the
+dead cards or the other player's holding. When hero combos x villain combos x
+runouts is small enough every case is enumerated exactly (see exact_equity),
+otherwise weighted combo pairs and runouts are sampled.
+
+    python ranges.py --hero AKs --villain "top 15%" --board "Ah Kd 7c"
+    python ranges.py --batch spots.jsonl   # one {"hero", "villain", "board", "dead"} object per line
+"""
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import time
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from math import comb
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import hand_evaluator
+from card import CARD_MASKS, indices_to_mask
+from equity import EquityEstimate
+from exact_equity import Combo, exact_equity
+from hand_evaluator import HandEvaluator
+from preflop import hand_classes, load_table
+
+_RANK_SYMBOLS = "23456789TJQKA"
+_SUIT_SYMBOLS = "shdc"  # in Suit order
+_CARD_PATTERN = re.compile(r"(?:10|[2-9tjqka])[shdc]", re.IGNORECASE)
+_CARDS_PATTERN = re.compile(r"\s*(?:(?:10|[2-9tjqka])[shdc]\s*)*", re.IGNORECASE)
+NUM_COMBOS = 1326
+
+# Above this many hero combo x villain combo x runout cases, range_equity samples
+DEFAULT_EXACT_LIMIT = 1_000_000
+# How often (in samples) the stopping rules are checked, and the fewest samples taken
+_CHECK_INTERVAL = 256
+_MIN_SAMPLES = 2048
+
+# Hand classes strongest first by equity against one random hand, loaded on first use
+_CLASS_ORDER: Optional[List[str]] = None
+
+
+def parse_card(text: str) -> int:
+    """Card index of a card written as rank then suit, e.g. "Ah", "Td" or "10d"."""
+    rank, suit = text[:-1].upper(), text[-1].lower()
+    if rank == "10":
+        rank = "T"
+    if len(rank) != 1 or rank not in _RANK_SYMBOLS or suit not in _SUIT_SYMBOLS:
+        raise ValueError(f"Not a card: {text!r}")
+    return _SUIT_SYMBOLS.index(suit) * 13 + _RANK_SYMBOLS.index(rank) + 1
+
+
+def parse_cards(text: str) -> List[int]:
+    """Card indices of cards written next to each other or separated by spaces or commas, e.g. "AhKd 7c"."""
+    text = text.replace(",", " ")
+    if not _CARDS_PATTERN.fullmatch(text):
+        raise ValueError(f"Not a card list: {text!r}")
+    cards = [parse_card(match.group()) for match in _CARD_PATTERN.finditer(text)]
+    if len(set(cards)) != len(cards):
+        raise ValueError(f"Repeated card in {text!r}")
+    return cards
+
+
+def card_name(index: int) -> str:
+    return _RANK_SYMBOLS[(index - 1) % 13] + _SUIT_SYMBOLS[(index - 1) // 13]
+
+
+def _class_combos(name: str) -> List[Tuple[int, int]]:
+    """The holdings of a hand class such as "AA", "AKs", "AKo" or "AK", lower index first."""
+    high = _RANK_SYMBOLS.index(name[0]) + 1
+    low = _RANK_SYMBOLS.index(name[1]) + 1
+    shape = name[2:]
+    combos = []
+    for suit1 in range(4):
+        for suit2 in range(4):
+            if high == low and suit2 <= suit1:
+                continue
+            if shape == "s" and suit1 != suit2 or shape == "o" and suit1 == suit2:
+                continue
+            card1, card2 = suit1 * 13 + high, suit2 * 13 + low
+            combos.append((min(card1, card2), max(card1, card2)))
+    return combos
+
+
+def class_order() -> List[str]:
+    """The 169 hand classes, strongest first by all-in equity against one random hand."""
+    global _CLASS_ORDER
+    if _CLASS_ORDER is None:
+        table = load_table()
+        _CLASS_ORDER = sorted(hand_classes(), key=lambda name: -table[name][0])
+    return _CLASS_ORDER
+
+
+def _class_name(text: str) -> Optional[str]:
+    """Normalizes a hand class such as "ako" to "AKo", with the higher rank first; None if text is not one."""
+    if len(text) not in (2, 3):
+        return None
+    first, second, shape = text[0].upper(), text[1].upper(), text[2:].lower()
+    if first not in _RANK_SYMBOLS or second not in _RANK_SYMBOLS or shape not in ("", "s", "o"):
+        return None
+    if _RANK_SYMBOLS.index(first) < _RANK_SYMBOLS.index(second):
+        first, second = second, first
+    if first == second and shape:
+        return None
+    return first + second + shape
+
+
+def _class_span(start: str, stop: str) -> List[str]:
+    """Hand classes from start to stop: pairs ("22-66"), or one high card with a span of kickers ("A2s-A5s")."""
+    low_start, low_stop = _RANK_SYMBOLS.index(start[1]), _RANK_SYMBOLS.index(stop[1])
+    if low_start > low_stop:
+        start, stop = stop, start
+        low_start, low_stop = low_stop, low_start
+    if start[0] == start[1] and stop[0] == stop[1]:
+        return [rank + rank for rank in _RANK_SYMBOLS[low_start:low_stop + 1]]
+    if start[0] != stop[0] or start[2:] != stop[2:] or start[0] == start[1] or stop[0] == stop[1]:
+        raise ValueError(f"Cannot span {start}-{stop}")
+    return [start[0] + rank + start[2:] for rank in _RANK_SYMBOLS[low_start:low_stop + 1]]
+
+
+def _plus(name: str) -> List[str]:
+    """QQ+ is QQ to AA, A9s+ is A9s to AKs."""
+    high = _RANK_SYMBOLS.index(name[0])
+    low = _RANK_SYMBOLS.index(name[1])
+    if high == low:
+        return [rank + rank for rank in _RANK_SYMBOLS[low:]]
+    return [name[0] + rank + name[2:] for rank in _RANK_SYMBOLS[low:high]]
+
+
+class Range:
+    """
+    Weighted two card holdings, keyed by their card indices with the lower index
+    first. Holdings that are not in the range have weight 0.
+    """
+
+    def __init__(self, weights: Optional[Dict[Tuple[int, int], float]] = None):
+        self.weights: Dict[Tuple[int, int], float] = {}
+        for (card1, card2), weight in (weights or {}).items():
+            self.set(card1, card2, weight)
+
+    @classmethod
+    def parse(cls, text: str) -> "Range":
+        """Parses a range written as described in the module docstring."""
+        parsed = cls()
+        for term in text.split(","):
+            term = term.strip()
+            if not term:
+                continue
+            weight = 1.0
+            if ":" in term:
+                term, _, value = term.rpartition(":")
+                term = term.strip()
+                weight = float(value)
+            for card1, card2 in _term_combos(term):
+                parsed.set(card1, card2, weight)
+        return parsed
+
+    @classmethod
+    def top(cls, percent: float) -> "Range":
+        """
+        The strongest hand classes by pre-flop equity against one random hand,
+        adding whole classes until at least percent of the 1326 holdings are in.
+        """
+        return cls({combo: 1.0 for combo in _top_combos(percent)})
+
+    @classmethod
+    def holding(cls, card1: int, card2: int) -> "Range":
+        """A range of one holding."""
+        single = cls()
+        single.set(card1, card2, 1.0)
+        return single
+
+    def set(self, card1: int, card2: int, weight: float):
+        if card1 == card2 or not (1 <= card1 <= 52 and 1 <= card2 <= 52):
+            raise ValueError(f"Not a holding: {card1}, {card2}")
+        if weight < 0:
+            raise ValueError("Weights cannot be negative")
+        combo = (card1, card2) if card1 < card2 else (card2, card1)
+        if weight > 0:
+            self.weights[combo] = weight
+        else:
+            self.weights.pop(combo, None)
+
+    def combos(self, dead_cards: Iterable[int] = ()) -> List[Combo]:
+        """The (card1, card2, weight) holdings of the range that share no card with dead_cards."""
+        dead_mask = indices_to_mask(card for card in dead_cards if card)
+        return [(card1, card2, weight) for (card1, card2), weight in self.weights.items()
+                if not dead_mask & (CARD_MASKS[card1] | CARD_MASKS[card2])]
+
+    @property
+    def total_weight(self) -> float:
+        return sum(self.weights.values())
+
+    def fraction(self) -> float:
+        """The weighted share of all 1326 holdings in the range."""
+        return self.total_weight / NUM_COMBOS
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def __contains__(self, holding) -> bool:
+        card1, card2 = holding
+        return (min(card1, card2), max(card1, card2)) in self.weights
+
+    def __str__(self) -> str:
+        terms = []
+        for (card1, card2), weight in sorted(self.weights.items()):
+            if (card1 - 1) % 13 < (card2 - 1) % 13:
+                card1, card2 = card2, card1
+            term = card_name(card1) + card_name(card2)
+            terms.append(term if weight == 1 else f"{term}:{weight:g}")
+        return ",".join(terms)
+
+
+def _top_combos(percent: float) -> List[Tuple[int, int]]:
+    target = percent / 100 * NUM_COMBOS
+    combos = []
+    for name in class_order():
+        if len(combos) >= target:
+            break
+        combos.extend(_class_combos(name))
+    return combos
+
+
+def _term_combos(term: str) -> List[Tuple[int, int]]:
+    lowered = term.lower()
+    if lowered.endswith("%"):
+        return _top_combos(float(lowered.removeprefix("top").removesuffix("%")))
+    if lowered in ("any", "random"):
+        return _top_combos(100)
+
+    if term.endswith("+"):
+        name = _class_name(term[:-1])
+        if name is None:
+            raise ValueError(f"Not a range term: {term!r}")
+        names = _plus(name)
+    elif "-" in term:
+        start, _, stop = term.partition("-")
+        start_name, stop_name = _class_name(start.strip()), _class_name(stop.strip())
+        if start_name is None or stop_name is None:
+            raise ValueError(f"Not a range term: {term!r}")
+        names = _class_span(start_name, stop_name)
+    else:
+        name = _class_name(term)
+        if name is None:
+            cards = parse_cards(term)
+            if len(cards) != 2:
+                raise ValueError(f"Not a range term: {term!r}")
+            return [(min(cards), max(cards))]
+        names = [name]
+    return [combo for name in names for combo in _class_combos(name)]
+
+
+def as_range(value: Union[Range, str]) -> Range:
+    """Ranges are returned as they are; range text is parsed once and the parsed Range shared, so do not modify it."""
+    return value if isinstance(value, Range) else _parse_cached(value)
+
+
+@lru_cache(maxsize=256)
+def _parse_cached(text: str) -> Range:
+    return Range.parse(text)
+
+
+def range_equity(hero: Union[Range, str], villain: Union[Range, str], community_cards: Iterable[int] = (),
+                 dead_cards: Iterable[int] = (), exact_limit: int = DEFAULT_EXACT_LIMIT,
+                 max_samples: int = 200_000, time_budget: Optional[float] = None, target_error: float = 0.002,
+                 z: float = 1.96, rng: Optional[random.Random] = None) -> EquityEstimate:
+    """
+    All-in equity of the hero's range against the villain's, heads-up. Each
+    pair of holdings counts in proportion to the product of their weights, and
+    pairs that share a card, or that use a board or dead card, are impossible.
+
+    Spots with a flop, turn or river and at most exact_limit cases (hero combos
+    x villain combos x runouts) are enumerated exactly; others are sampled until
+    max_samples, time_budget seconds, or until the confidence interval is
+    narrower than target_error on each side. Samples are drawn from rng, the
+    module level random generator by default.
+
+    Parameters:
+        hero, villain: Ranges, or range text for Range.parse
+        community_cards: the board card indices dealt so far (0 entries are ignored)
+        dead_cards: card indices known to be out of play
+
+    Returns:
+        An EquityEstimate; exact results have an error of 0 and count the hands compared as samples
+    """
+    board = [card for card in community_cards if card]
+    dead = [card for card in dead_cards if card]
+    if len(board) > 5:
+        raise ValueError("Expected at most five community cards")
+    hero_combos = as_range(hero).combos(board + dead)
+    villain_combos = as_range(villain).combos(board + dead)
+    if not hero_combos or not villain_combos:
+        raise ValueError("A range has no holding left that is possible with these cards")
+
+    live = 52 - len(board) - len(set(dead) - set(board))
+    runouts = comb(live - 4, 5 - len(board))
+    if len(board) >= 3 and len(hero_combos) * len(villain_combos) * runouts <= exact_limit:
+        return _exact_range_equity(hero_combos, villain_combos, board, dead)
+    return _sampled_range_equity(hero_combos, villain_combos, board, dead, max_samples, time_budget,
+                                 target_error, z, rng if rng is not None else random)
+
+
+def _exact_range_equity(hero_combos: List[Combo], villain_combos: List[Combo], board: List[int],
+                        dead: List[int]) -> EquityEstimate:
+    villain_masks = [(CARD_MASKS[card1] | CARD_MASKS[card2], weight) for card1, card2, weight in villain_combos]
+    won = 0.0
+    total = 0.0
+    compared = 0
+    for card1, card2, weight in hero_combos:
+        hero_mask = CARD_MASKS[card1] | CARD_MASKS[card2]
+        # The hero holding is chosen in proportion to its weight times the weight
+        # of the villain holdings still possible with it
+        possible = sum(villain_weight for mask, villain_weight in villain_masks if not mask & hero_mask)
+        if possible == 0:
+            continue
+        estimate = exact_equity([card1, card2], board, villain_combos, dead)
+        won += weight * possible * estimate.equity
+        total += weight * possible
+        compared += estimate.samples
+    if total == 0:
+        raise ValueError("No pair of holdings is possible with these cards")
+    return EquityEstimate(won / total, 0.0, compared)
+
+
+def _sampled_range_equity(hero_combos: List[Combo], villain_combos: List[Combo], board: List[int], dead: List[int],
+                          max_samples: int, time_budget: Optional[float], target_error: float, z: float,
+                          rng: random.Random) -> EquityEstimate:
+    card_keys = hand_evaluator._CARD_KEYS
+    evaluate_key = HandEvaluator.evaluate_key
+    board_key, board_mask = HandEvaluator.partial_key(board)
+    known_mask = board_mask | indices_to_mask(dead)
+    board_needed = 5 - len(board)
+
+    def prepare(combos):
+        holdings = [(card_keys[card1] + card_keys[card2], CARD_MASKS[card1] | CARD_MASKS[card2])
+                    for card1, card2, _ in combos]
+        return holdings, list(accumulate(weight for _, _, weight in combos))
+
+    hero_holdings, hero_cumulative = prepare(hero_combos)
+    villain_holdings, villain_cumulative = prepare(villain_combos)
+    hero_total, villain_total = hero_cumulative[-1], villain_cumulative[-1]
+    draw = rng.random
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    samples = 0
+    rejected = 0
+    total = 0.0
+    total_squared = 0.0
+    while samples < max_samples:
+        hero_key, hero_mask = hero_holdings[bisect_right(hero_cumulative, draw() * hero_total)]
+        villain_key, villain_mask = villain_holdings[bisect_right(villain_cumulative, draw() * villain_total)]
+        if hero_mask & villain_mask:
+            # Drawing again gives pairs in proportion to their weights among the possible ones
+            rejected += 1
+            if rejected > 1000 and rejected > 100 * samples:
+                raise ValueError("No pair of holdings is possible with these cards")
+            continue
+
+        used = known_mask | hero_mask | villain_mask
+        key = board_key
+        mask = board_mask
+        for _ in range(board_needed):
+            card_mask = CARD_MASKS[int(draw() * 52) + 1]
+            while card_mask & used:
+                card_mask = CARD_MASKS[int(draw() * 52) + 1]
+            used |= card_mask
+            mask |= card_mask
+            key += card_keys[card_mask.bit_length()]
+
+        hero = evaluate_key(key + hero_key, mask | hero_mask)
+        villain = evaluate_key(key + villain_key, mask | villain_mask)
+        result = 1.0 if hero > villain else 0.5 if hero == villain else 0.0
+        samples += 1
+        total += result
+        total_squared += result * result
+
+        if samples % _CHECK_INTERVAL == 0:
+            if samples >= _MIN_SAMPLES and _error(samples, total, total_squared, z) <= target_error:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+    if samples == 0:
+        raise ValueError("No pair of holdings is possible with these cards")
+    return EquityEstimate(total / samples, _error(samples, total, total_squared, z), samples)
+
+
+def _error(samples: int, total: float, total_squared: float, z: float) -> float:
+    if samples < 2:
+        return 1.0
+    mean = total / samples
+    variance = max(total_squared / samples - mean * mean, 0.0) * samples / (samples - 1)
+    return z * math.sqrt(variance / samples)
+
+
+def solve_spot(spot: dict, **options) -> dict:
+    """
+    Equity of one batch spot: a dict with "hero" and "villain" range text and
+    optional "board" and "dead" card text. Returns the spot with the results added.
+    """
+    estimate = range_equity(spot["hero"], spot["villain"], parse_cards(spot.get("board", "")),
+                            parse_cards(spot.get("dead", "")), **options)
+    return {**spot, "equity": estimate.equity, "error": estimate.error, "samples": estimate.samples}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hero", help="hero range")
+    parser.add_argument("--villain", help="villain range")
+    parser.add_argument("--board", default="", help='community cards, e.g. "Ah Kd 7c"')
+    parser.add_argument("--dead", default="", help="cards out of play")
+    parser.add_argument("--batch", help='JSON lines file of spots, "-" for stdin; results are written as JSON lines')
+    parser.add_argument("--exact-limit", type=int, default=DEFAULT_EXACT_LIMIT,
+                        help="largest number of cases to enumerate exactly")
+    parser.add_argument("--samples", type=int, default=200_000, help="most samples per sampled spot")
+    parser.add_argument("--target-error", type=float, default=0.002)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    options = dict(exact_limit=args.exact_limit, max_samples=args.samples, target_error=args.target_error,
+                   rng=random.Random(args.seed))
+    if args.batch:
+        spots = sys.stdin if args.batch == "-" else open(args.batch)
+        with spots:
+            for line in spots:
+                if line.strip():
+                    print(json.dumps(solve_spot(json.loads(line), **options)), flush=True)
+        return
+    if not args.hero or not args.villain:
+        parser.error("--hero and --villain are required without --batch")
+    start = time.perf_counter()
+    result = solve_spot({"hero": args.hero, "villain": args.villain, "board": args.board, "dead": args.dead},
+                        **options)
+    kind = "exact" if result["error"] == 0 else "sampled"
+    print(f"{result['equity']:.4f} ± {result['error']:.4f} ({kind}, {result['samples']} hands compared, "
+          f"{time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Bots by name. Nothing is imported until a bot is asked for, so a worker
+process only loads the bots it seats.
+
+A bot spec is one of:
+
+    pokerbot               a registered name, see BUILTIN_BOTS and register()
+    my_players:PokerBot    a module and class (or any callable) in it
+    anything else          the name of an entry point in the "poker.bots" group,
+                           for bots shipped in other installed packages
+"""
+import importlib
+import inspect
+from functools import partial
+from typing import Callable, Dict, List, Union
+from player import Player
+
+ENTRY_POINT_GROUP = "poker.bots"
+
+# A bot factory is called as factory(name, stack)
+BotFactory = Callable[[str, int], Player]
+
+BUILTIN_BOTS: Dict[str, str] = {
+    "pokerbot": "my_players:PokerBot",
+    "fold": "baseplayers:FoldPlayer",
+    "raise": "baseplayers:RaisePlayer",
+    "input": "baseplayers:InputPlayer",
+}
+
+_REGISTRY: Dict[str, Union[str, BotFactory]] = dict(BUILTIN_BOTS)
+
+
+def register(name: str, bot: Union[str, BotFactory]):
+    """Registers a bot under a name, as a "module:Class" string (imported when first resolved) or a factory."""
+    _REGISTRY[name.lower()] = bot
+
+
+def _import(target: str) -> BotFactory:
+    module_name, _, attribute = target.partition(":")
+    value = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        value = getattr(value, part)
+    return value
+
+
+def _entry_points():
+    # importlib.metadata scans the installed distributions, so only do it when needed
+    from importlib.metadata import entry_points
+    return entry_points(group=ENTRY_POINT_GROUP)
+
+
+def resolve(spec: str) -> BotFactory:
+    """Returns the class or factory a bot spec names, importing its module now."""
+    bot = _REGISTRY.get(spec.lower())
+    if bot is not None:
+        if isinstance(bot, str):
+            bot = _REGISTRY[spec.lower()] = _import(bot)
+        return bot
+    if ":" in spec:
+        return _import(spec)
+    for entry_point in _entry_points():
+        if entry_point.name == spec:
+            return entry_point.load()
+    raise ValueError(f"Unknown bot {spec!r}, expected one of {', '.join(available())} or module:Class")
+
+
+def load_bot(spec: str) -> BotFactory:
+    """Resolves a bot spec to a factory. PokerBot style bots are created without console output."""
+    cls = resolve(spec)
+    if "verbose" in inspect.signature(cls).parameters:
+        return partial(cls, verbose=False)
+    return cls
+
+
+def bot_label(spec: str) -> str:
+    """A short display name for a bot spec: the class name of "module:Class", otherwise the spec."""
+    return spec.rpartition(":")[2].rpartition(".")[2] or spec
+
+
+def available() -> List[str]:
+    """Registered names and installed entry points, without importing any bot."""
+    return sorted(set(_REGISTRY) | {entry_point.name for entry_point in _entry_points()})
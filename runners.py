@@ -0,0 +1,228 @@
+"""
+Ways of running a player's decision. PokerGame calls player.action() inline by
+default; a ThreadRunner or ProcessRunner (pass runner= to PokerGame) runs every
+bot in its own worker under a per-decision deadline instead, and plays a default
+action for the bot when it misses the deadline or its worker dies.
+"""
+import queue
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from game_state import CURRENT_BET
+from player import ActionEvent, Player, PlayerAction
+
+Decision = Tuple[PlayerAction, int]
+
+
+def default_action(game_state: Sequence[int], player: Player) -> Decision:
+    """Checks when that is allowed, folds otherwise."""
+    if game_state[CURRENT_BET] <= player.bet_amount:
+        return PlayerAction.CHECK, 0
+    return PlayerAction.FOLD, 0
+
+
+class BotRunner:
+    """
+    Gets a decision out of a player. decide() first hands the player the new
+    action events (see Player.observe_actions), then asks for its action.
+    """
+
+    def decide(self, seat: int, player: Player, events: List[ActionEvent], game_state: Sequence[int],
+               action_history: Sequence) -> Decision:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class InlineRunner(BotRunner):
+    """Calls the player directly on the game's thread, with no deadline. This is what PokerGame uses by default."""
+
+    def decide(self, seat: int, player: Player, events: List[ActionEvent], game_state: Sequence[int],
+               action_history: Sequence) -> Decision:
+        if events:
+            player.observe_actions(seat, events)
+        return player.action(game_state, action_history)
+
+
+def _observe_and_act(seat: int, player: Player, events: List[ActionEvent], game_state: Sequence[int],
+                     action_history: Sequence) -> Decision:
+    if events:
+        player.observe_actions(seat, events)
+    return player.action(game_state, action_history)
+
+
+class _ThreadWorker:
+    """A daemon thread running calls one at a time. A worker that misses a deadline is abandoned, never reused."""
+
+    def __init__(self, name: str):
+        self.requests = queue.SimpleQueue()
+        self.results = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            fn, args = request
+            try:
+                self.results.put((True, fn(*args)))
+            except BaseException as e:
+                self.results.put((False, e))
+
+    def call(self, fn: Callable, args: tuple, timeout: Optional[float]):
+        self.requests.put((fn, args))
+        try:
+            ok, value = self.results.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError from None
+        if not ok:
+            raise value
+        return value
+
+    def stop(self):
+        self.requests.put(None)
+
+
+class ThreadRunner(BotRunner):
+    """
+    Runs each seat's decisions on its own worker thread and waits at most
+    timeout seconds for them. A bot that misses the deadline plays
+    default(game_state, player); its worker is left to finish in the
+    background and the seat gets a fresh one. Exceptions raised by the bot are
+    re-raised to the game, as with InlineRunner.
+
+    The bot is given a snapshot of the game state, but it shares the player
+    object with the game, so a bot still running after its deadline can see
+    later changes to it, and can still be running when its next decision
+    starts on the fresh worker. Bots must therefore be safe to call from
+    several threads: no unguarded state shared with other bots, and no buffers
+    reused across calls. PokerBot keeps its equity estimator and cache per bot.
+    """
+
+    def __init__(self, timeout: Optional[float],
+                 default: Callable[[Sequence[int], Player], Decision] = default_action):
+        self.timeout = timeout
+        self.default = default
+        self.workers: Dict[int, _ThreadWorker] = {}
+        self.timeouts = Counter()  # by player name
+
+    def decide(self, seat: int, player: Player, events: List[ActionEvent], game_state: Sequence[int],
+               action_history: Sequence) -> Decision:
+        worker = self.workers.get(seat)
+        if worker is None:
+            worker = self.workers[seat] = _ThreadWorker(f"bot-{player.name}")
+        snapshot = game_state[:]
+        try:
+            return worker.call(_observe_and_act, (seat, player, events, snapshot, action_history), self.timeout)
+        except TimeoutError:
+            self.timeouts[player.name] += 1
+            del self.workers[seat]
+            worker.stop()
+            return self.default(snapshot, player)
+
+    def close(self):
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers.clear()
+
+
+def _serve(connection, player: Player):
+    """Loop of a ProcessRunner worker: keeps its own copy of the player and of the action history."""
+    action_history = []
+    while True:
+        request = connection.recv()
+        if request is None:
+            return
+        seat, events, history, game_state, (stack, bet_amount, status, hole_cards) = request
+        player.stack, player.bet_amount, player.status, player.hole_cards = stack, bet_amount, status, hole_cards
+        action_history.extend(history)
+        try:
+            connection.send((True, _observe_and_act(seat, player, events, game_state, action_history)))
+        except Exception as e:
+            connection.send((False, e))
+
+
+class _ProcessWorker:
+    def __init__(self, player: Player, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_connection, player), daemon=True,
+                                       name=f"bot-{player.name}")
+        self.process.start()
+        child_connection.close()
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class ProcessRunner(BotRunner):
+    """
+    Runs each seat's bot in its own process, so bots think in parallel and a
+    hung or crashed bot can be killed. The worker gets a copy of the player when
+    it starts, then the new actions, the game state and the player's stack,
+    bet, status and hole cards with every decision.
+
+    A bot that misses the deadline or whose process dies plays
+    default(game_state, player). Its process is killed and restarted from the
+    game's player object, so anything the bot learned is lost.
+    The player must be picklable.
+    """
+
+    def __init__(self, timeout: Optional[float],
+                 default: Callable[[Sequence[int], Player], Decision] = default_action,
+                 context: Optional[str] = None):
+        # Imported here so that loading the engine does not pay for multiprocessing
+        import multiprocessing
+        self.timeout = timeout
+        self.default = default
+        self.context = multiprocessing.get_context(context)
+        self.workers: Dict[int, _ProcessWorker] = {}
+        self.timeouts = Counter()  # by player name
+        self.crashes = Counter()
+
+    def decide(self, seat: int, player: Player, events: List[ActionEvent], game_state: Sequence[int],
+               action_history: Sequence) -> Decision:
+        worker = self.workers.get(seat)
+        if worker is None:
+            worker = self.workers[seat] = _ProcessWorker(player, self.context)
+        snapshot = game_state[:]
+        history = action_history[len(action_history) - len(events):] if events else []
+        fields = (player.stack, player.bet_amount, player.status, player.hole_cards)
+        try:
+            worker.connection.send((seat, events, history, snapshot, fields))
+            if worker.connection.poll(self.timeout):
+                ok, value = worker.connection.recv()
+                if not ok:
+                    raise value
+                return value
+            self.timeouts[player.name] += 1
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            self.crashes[player.name] += 1
+        del self.workers[seat]
+        worker.stop(kill=True)
+        return self.default(snapshot, player)
+
+    def close(self):
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers.clear()
+
@@ -0,0 +1,226 @@
+"""
+Head to head bot comparisons that stop as soon as the result is clear.
+
+Hands (or duplicate deals, see duplicate.py) are played in seeded blocks and
+fed one at a time into running statistics of the difference between two bots'
+results in big blinds per 100 hands. A three-way sequential probability ratio
+test decides between "A is better by epsilon", "B is better by epsilon" and
+"equivalent within epsilon" after every hand or deal, and the match stops at
+the first decision or at max_hands.
+
+    python sequential.py pokerbot raise --epsilon 20
+"""
+import argparse
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Optional
+from duplicate import play_duplicate_block
+from registry import bot_label, load_bot
+from tournament import BotEntry, block_seeds, play_block_results
+
+BETTER = "better"
+WORSE = "worse"
+EQUIVALENT = "equivalent"
+UNDECIDED = "undecided"  # max_hands was reached first
+
+
+class RunningStats:
+    """Mean and variance of a stream of values, updated in O(1) per value with Welford's method."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._squares = 0.0  # sum of squared deviations from the mean
+
+    def push(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._squares += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._squares / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std_error(self) -> float:
+        """Standard error of the mean."""
+        return math.sqrt(self.variance / self.count) if self.count > 1 else float("inf")
+
+
+class SequentialTest:
+    """
+    Sobel and Wald's three-way test of the mean of normally distributed values,
+    built from two SPRTs: -epsilon against 0, and 0 against +epsilon. Each SPRT
+    stops at the first crossing of its Wald bounds, and the test decides once
+    both have stopped. The variance is estimated from the values seen so far,
+    which is why no decision is made before min_count values.
+
+    alpha is the chance of calling equal bots different, beta the chance of
+    calling bots epsilon apart equivalent.
+    """
+
+    def __init__(self, epsilon: float, alpha: float = 0.05, beta: float = 0.05, min_count: int = 100):
+        if epsilon <= 0:
+            raise ValueError("epsilon must be positive")
+        self.epsilon = epsilon
+        self.min_count = min_count
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.reset()
+
+    def reset(self):
+        self.low_outcome: Optional[bool] = None  # True once the mean is accepted as below 0, False for not below
+        self.high_outcome: Optional[bool] = None  # True once the mean is accepted as above 0, False for not above
+
+    def _log_ratio(self, stats: RunningStats, mean0: float, mean1: float) -> float:
+        # Log likelihood ratio of mean1 against mean0 for normal values
+        variance = max(stats.variance, 1e-12)
+        return (mean1 - mean0) / variance * stats.count * (stats.mean - (mean0 + mean1) / 2)
+
+    def update(self, stats: RunningStats) -> Optional[str]:
+        """Returns BETTER, WORSE or EQUIVALENT once the test has decided, None while it needs more values."""
+        if stats.count < self.min_count:
+            return None
+        if self.low_outcome is None:
+            ratio = self._log_ratio(stats, -self.epsilon, 0.0)
+            if ratio <= self.lower:
+                self.low_outcome = True
+            elif ratio >= self.upper:
+                self.low_outcome = False
+        if self.high_outcome is None:
+            ratio = self._log_ratio(stats, 0.0, self.epsilon)
+            if ratio >= self.upper:
+                self.high_outcome = True
+            elif ratio <= self.lower:
+                self.high_outcome = False
+        if self.low_outcome is None or self.high_outcome is None:
+            return None
+        if self.high_outcome and not self.low_outcome:
+            return BETTER
+        if self.low_outcome and not self.high_outcome:
+            return WORSE
+        if not self.low_outcome and not self.high_outcome:
+            return EQUIVALENT
+        # Both extremes accepted at different times: start both tests over
+        self.low_outcome = self.high_outcome = None
+        return None
+
+
+@dataclass
+class SequentialResult:
+    name: str  # bot A
+    other: str  # bot B
+    decision: str  # BETTER, WORSE or EQUIVALENT for A against B, or UNDECIDED
+    hands: int
+    seconds: float
+    difference: RunningStats  # A minus B per hand or deal, in bb/100
+
+    def confidence_interval(self, z: float = 1.96) -> tuple:
+        error = z * self.difference.std_error
+        return self.difference.mean - error, self.difference.mean + error
+
+    def summary(self, z: float = 1.96) -> str:
+        low, high = self.confidence_interval(z)
+        verdict = {BETTER: f"{self.name} is better", WORSE: f"{self.other} is better",
+                   EQUIVALENT: "equivalent", UNDECIDED: "undecided"}[self.decision]
+        return (f"{verdict} after {self.hands} hands ({self.seconds:.2f}s): {self.name} - {self.other} "
+                f"{self.difference.mean:+.2f} bb/100, [{low:+.2f}, {high:+.2f}]")
+
+
+def run_sequential(bots: List[BotEntry], test: SequentialTest, max_hands: int = 100_000, duplicate: bool = True,
+                   units_per_block: int = 100, workers: Optional[int] = None, seed: int = 0, big_blind: int = 20,
+                   stack: int = 1000) -> SequentialResult:
+    """
+    Compares the first two bots in bots (any others just play along). A unit is
+    one duplicate deal, played once per seat rotation, or one hand when
+    duplicate is False; blocks of units_per_block units are played in order of
+    their seeds, a few at a time across a process pool (in this process with
+    workers=1), and results past the deciding unit are discarded, so the result
+    only depends on the seed and the block size, not on the number of workers.
+    """
+    names = [name for name, _ in bots]
+    if len(names) < 2 or len(set(names)) != len(names):
+        raise ValueError("Expected at least two bots with unique names")
+    name, other = names[:2]
+    hands_per_unit = len(bots) if duplicate else 1
+    # One unit's difference in chips, as bb/100
+    scale = 100 / (hands_per_unit * big_blind)
+
+    max_units = max(max_hands // hands_per_unit, 1)
+    num_blocks = -(-max_units // units_per_block)
+    seeds = block_seeds(seed, num_blocks)
+    sizes = [min(units_per_block, max_units - block * units_per_block) for block in range(num_blocks)]
+    play = partial(play_duplicate_block if duplicate else play_block_results, bots, big_blind=big_blind, stack=stack)
+
+    test.reset()
+    difference = RunningStats()
+    decision = None
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        if executor is None:
+            blocks = map(play, seeds, sizes)
+        else:
+            blocks = _in_order(executor, play, seeds, sizes, 2 * (workers or os.cpu_count() or 1))
+        for results in blocks:
+            for a, b in zip(results[name], results[other]):
+                difference.push((a - b) * scale)
+                decision = test.update(difference)
+                if decision is not None:
+                    break
+            if decision is not None:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    seconds = time.perf_counter() - start
+    return SequentialResult(name, other, decision or UNDECIDED, difference.count * hands_per_unit, seconds,
+                            difference)
+
+
+def _in_order(executor: ProcessPoolExecutor, play, seeds: List[int], sizes: List[int], ahead: int):
+    """Yields the blocks' results in order, keeping at most ahead blocks submitted."""
+    pending = deque()
+    jobs = iter(zip(seeds, sizes))
+    for block_seed, size in jobs:
+        pending.append(executor.submit(play, block_seed, size))
+        if len(pending) >= ahead:
+            break
+    while pending:
+        results = pending.popleft().result()
+        for block_seed, size in jobs:
+            pending.append(executor.submit(play, block_seed, size))
+            break
+        yield results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("bots", nargs="+", help="bots to seat, as a registered name or module:Class; the first two are compared")
+    parser.add_argument("--epsilon", type=float, default=20.0, help="difference in bb/100 worth detecting")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--max-hands", type=int, default=100_000)
+    parser.add_argument("--no-duplicate", action="store_true", help="play plain hands instead of duplicate deals")
+    parser.add_argument("--block", type=int, default=100, help="hands or deals per worker task")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stack", type=int, default=1000)
+    parser.add_argument("--big-blind", type=int, default=20)
+    args = parser.parse_args()
+
+    bots = [(f"{bot_label(spec)} {i + 1}", load_bot(spec)) for i, spec in enumerate(args.bots)]
+    test = SequentialTest(args.epsilon, args.alpha, args.beta)
+    result = run_sequential(bots, test, args.max_hands, duplicate=not args.no_duplicate, units_per_block=args.block,
+                            workers=args.workers, seed=args.seed, big_blind=args.big_blind, stack=args.stack)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from events import EventSink, NullSink
+from game import PokerGame, GamePhase
+from hand_history import HandHistoryWriter
+from player import Player, PlayerAction
+from registry import load_bot
+from runners import BotRunner, ProcessRunner, ThreadRunner
+
+# Invalid actions in a row before a player is folded, as in main.run_game
+MAX_INVALID_ACTIONS = 3
+
+
+@dataclass
+class SimulationResult:
+    hands: int
+    decisions: int
+    seconds: float
+    stacks: Dict[str, int]
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def decisions_per_second(self) -> float:
+        return self.decisions / self.seconds if self.seconds > 0 else float("inf")
+
+
+def play_hand(game: PokerGame) -> int:
+    """
+    Plays one hand from start to showdown with the same rules as main.run_game.
+    Returns the number of decisions the players were asked for.
+    """
+    game.start_new_hand()
+    num_tries = 0
+    decisions = 0
+    while game.phase != GamePhase.SHOWDOWN:
+        if num_tries == MAX_INVALID_ACTIONS:
+            game.player_action(PlayerAction.FOLD, 0)
+            num_tries = 0
+            continue
+
+        player = game.players[game.active_player_index]
+        if game.num_active_players() == 1 and player.bet_amount == game.current_bet:
+            game.advance_game_phase()
+            continue
+
+        try:
+            is_successful = game.get_player_input()
+        except TypeError:
+            is_successful = False
+        decisions += 1
+        num_tries = 0 if is_successful else num_tries + 1
+    return decisions
+
+
+def simulate(players: List[Player], num_hands: int, big_blind: int = 20,
+             starting_stack: Optional[int] = None, sink: Optional[EventSink] = None,
+             recorder: Optional[HandHistoryWriter] = None, runner: Optional[BotRunner] = None) -> SimulationResult:
+    """
+    Plays num_hands hands back-to-back without sleeping, headless unless a sink is given.
+
+    If starting_stack is set every player is reset to it before each hand, so nobody
+    busts. Otherwise the simulation stops early once fewer than two players have chips.
+    Hands are recorded to recorder if one is given, and runner decides how the
+    bots are called (inline by default).
+    """
+    game = PokerGame(players, big_blind=big_blind, sink=sink if sink is not None else NullSink(),
+                     recorder=recorder, runner=runner)
+    hands = 0
+    decisions = 0
+    start = time.perf_counter()
+    while hands < num_hands:
+        if starting_stack is not None:
+            for player in players:
+                player.stack = starting_stack
+        elif sum(1 for player in players if player.stack > 0) < 2:
+            break
+        decisions += play_hand(game)
+        hands += 1
+    seconds = time.perf_counter() - start
+    return SimulationResult(hands, decisions, seconds, {player.name: player.stack for player in players})
+
+
+def play_tables(games: List[PokerGame], num_hands: int, starting_stack: Optional[int] = None) -> List[int]:
+    """
+    Plays num_hands hands on every game at the same time, one thread per table,
+    so a table waiting for a bot does not hold up the others. Give the games a
+    runners.ProcessRunner for the bots to think in parallel. starting_stack works
+    as in simulate(). Returns the number of decisions made at each table.
+
+    Bots at different tables run on different threads, so they must not share
+    unguarded state (PokerBot keeps its equity state per bot). Bots that draw
+    from the global random generator see the draws interleaved in thread
+    order, so the results are not reproducible from the game seeds.
+    """
+
+    def play(game: PokerGame) -> int:
+        decisions = 0
+        for _ in range(num_hands):
+            if starting_stack is not None:
+                for player in game.players:
+                    player.stack = starting_stack
+            elif sum(1 for player in game.players if player.stack > 0) < 2:
+                break
+            decisions += play_hand(game)
+        return decisions
+
+    with ThreadPoolExecutor(max_workers=len(games)) as executor:
+        return list(executor.map(play, games))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play PokerBots against each other headless.")
+    parser.add_argument("--hands", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--stack", type=int, default=1000)
+    parser.add_argument("--big-blind", type=int, default=20)
+    parser.add_argument("--record", metavar="DIR", help="write the hands to a binary hand history in DIR")
+    parser.add_argument("--runner", choices=["inline", "thread", "process"], default="inline",
+                        help="where the bots run, see runners.py")
+    parser.add_argument("--timeout", type=float, default=1.0,
+                        help="seconds a thread or process runner waits for a decision")
+    parser.add_argument("--bot", default="pokerbot", help="bot to seat at every seat, see registry.py")
+    args = parser.parse_args()
+
+    bot = load_bot(args.bot)
+    players = [bot(f"Bot {i + 1}", args.stack) for i in range(args.players)]
+    recorder = HandHistoryWriter(args.record) if args.record else None
+    runner = {"inline": None, "thread": ThreadRunner, "process": ProcessRunner}[args.runner]
+    runner = runner(args.timeout) if runner else None
+    result = simulate(players, args.hands, big_blind=args.big_blind, starting_stack=args.stack, recorder=recorder,
+                      runner=runner)
+    if recorder is not None:
+        recorder.close()
+    if runner is not None:
+        runner.close()
+        if runner.timeouts:
+            print(f"Decisions that timed out: {dict(runner.timeouts)}")
+    print(f"{result.hands} hands, {result.decisions} decisions in {result.seconds:.2f}s")
+    print(f"{result.hands_per_second:.0f} hands/sec, {result.decisions_per_second:.0f} decisions/sec")
+
+
+if __name__ == "__main__":
+    main()
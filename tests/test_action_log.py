@@ -0,0 +1,29 @@
+import pytest
+from action_log import ActionLog
+from baseplayers import RaisePlayer
+from events import NullSink
+from game import PokerGame
+from player import PlayerAction
+from simulation import play_hand
+
+
+@pytest.mark.parametrize("retention", [0, 1])
+def test_short_retention_keeps_the_hand_in_progress(retention):
+    log = ActionLog(["pre-flop"], ["a", "b"], retention_hands=retention)
+    for hand_number in range(1, 6):
+        log.append(hand_number, 0, "pre-flop", PlayerAction.RAISE, 40)
+        log.append(hand_number, 1, "pre-flop", PlayerAction.CALL, 40)
+        assert list(log.hand_numbers) == [hand_number]
+        assert [event.seat for event in log.hand(hand_number)] == [0, 1]
+        assert log.end == 2 * hand_number
+
+
+@pytest.mark.parametrize("retention", [0, 1])
+def test_game_with_short_history(retention):
+    players = [RaisePlayer(f"p{seat}", 1000) for seat in range(3)]
+    game = PokerGame(players, big_blind=20, sink=NullSink(), seed=1, history_hands=retention)
+    for _ in range(10):
+        for player in players:
+            player.stack = 1000
+        play_hand(game)
+    assert list(game.action_log.hand_numbers) == [game.game_number]
@@ -0,0 +1,32 @@
+from exact_equity import exact_equity
+from hand_evaluator import HandEvaluator
+from ranges import Range, parse_cards, range_equity
+
+HERO = parse_cards("2h3h")
+VILLAIN = parse_cards("8h4h")
+BOARD = parse_cards("7h9hJhKcQd")
+
+
+def test_dead_card_of_the_flush_suit_does_not_play_for_the_hero():
+    villain = [(VILLAIN[0], VILLAIN[1], 1.0)]
+    assert exact_equity(HERO, BOARD, villain).equity == 0.0
+    assert exact_equity(HERO, BOARD, villain, dead_cards=parse_cards("Ah")).equity == 0.0
+
+
+def test_dead_card_of_the_flush_suit_in_range_equity():
+    hero = Range.holding(*HERO)
+    villain = Range.holding(*VILLAIN)
+    assert range_equity(hero, villain, BOARD, dead_cards=parse_cards("Ah")).equity == 0.0
+
+    # On the turn, against every river the dead cards leave
+    turn, dead = BOARD[:4], parse_cards("AhTh5h")
+    results = []
+    for river in range(1, 53):
+        if river in HERO + VILLAIN + turn + dead:
+            continue
+        hero_strength = HandEvaluator.evaluate_indices(HERO + turn + [river])
+        villain_strength = HandEvaluator.evaluate_indices(VILLAIN + turn + [river])
+        results.append(1.0 if hero_strength > villain_strength else 0.5 if hero_strength == villain_strength else 0.0)
+    result = range_equity(hero, villain, turn, dead_cards=dead)
+    assert result.error == 0.0
+    assert abs(result.equity - sum(results) / len(results)) < 1e-12
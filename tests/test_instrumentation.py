@@ -0,0 +1,51 @@
+import pytest
+import exact_equity
+import my_players
+from equity import EquityEstimator
+from events import NullSink
+from game import PokerGame
+from hand_evaluator import HandEvaluator
+from instrumentation import Instruments
+from player import Player
+
+HAND = [1, 2, 3, 4, 5, 20, 30]
+
+
+def _game() -> PokerGame:
+    return PokerGame([Player("a", 1000), Player("b", 1000)], big_blind=20, sink=NullSink())
+
+
+def _patched_attributes():
+    return (HandEvaluator.__dict__["evaluate_indices"], EquityEstimator.__dict__["estimate"],
+            exact_equity.exact_equity, my_players.exact_equity)
+
+
+@pytest.mark.parametrize("first_out", [0, 1])
+def test_overlapping_instruments_restore_the_evaluators(first_out):
+    originals = _patched_attributes()
+    both = [Instruments(), Instruments()]
+    for instruments in both:
+        instruments.attach(_game())
+    HandEvaluator.evaluate_indices(HAND)
+    assert [instruments.evaluator_calls["evaluate_indices"] for instruments in both] == [1, 1]
+
+    both[first_out].detach()
+    HandEvaluator.evaluate_indices(HAND)
+    assert both[first_out].evaluator_calls["evaluate_indices"] == 1
+    assert both[1 - first_out].evaluator_calls["evaluate_indices"] == 2
+
+    both[1 - first_out].detach()
+    assert _patched_attributes() == originals
+    HandEvaluator.evaluate_indices(HAND)
+    assert [instruments.evaluator_calls["evaluate_indices"] for instruments in both][1 - first_out] == 2
+
+
+def test_a_game_takes_one_instruments_at_a_time():
+    game = _game()
+    with Instruments() as first:
+        first.attach(game)
+        first.attach(game)
+        with pytest.raises(ValueError):
+            Instruments().attach(game)
+    assert game.instruments is None
+    assert "player_action" not in vars(game)
@@ -0,0 +1,45 @@
+from events import NullSink
+from game import PokerGame, apply
+from player import Player, PlayerAction
+
+
+def _game() -> PokerGame:
+    players = [Player(f"p{seat}", 1000) for seat in range(4)]
+    game = PokerGame(players, big_blind=20, sink=NullSink(), seed=1)
+    game.start_new_hand()
+    return game
+
+
+def test_restoring_an_applied_snapshot_leaves_the_history_alone():
+    game = _game()
+    start = game.snapshot()
+    raised = apply(start, PlayerAction.RAISE, 100)
+    assert raised.log_end == -1
+
+    # The real game plays on differently
+    assert game.player_action(PlayerAction.FOLD, 0)
+    assert game.player_action(PlayerAction.CALL, 20)
+    history = list(game.action_history)
+    cursors = list(game.feed_cursors)
+
+    game.restore(raised)
+    assert game.snapshot()._replace(log_end=-1) == raised
+    assert list(game.action_history) == history
+    assert game.feed_cursors == cursors
+
+    game.restore(start)
+    assert game.snapshot() == start
+    assert list(game.action_history) == []
+    assert game.feed_cursors == [0] * len(game.players)
+
+
+def test_restoring_a_logged_snapshot_rewinds_the_history():
+    game = _game()
+    assert game.player_action(PlayerAction.CALL, 20)
+    after_call = game.snapshot()
+    history = list(game.action_history)
+    assert game.player_action(PlayerAction.FOLD, 0)
+
+    game.restore(after_call)
+    assert game.snapshot() == after_call
+    assert list(game.action_history) == history
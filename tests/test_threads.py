@@ -0,0 +1,47 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from equity import EquityEstimator
+from events import NullSink
+from exact_equity import exact_equity
+from game import PokerGame
+from my_players import PokerBot
+from runners import ThreadRunner
+from simulation import play_tables, simulate
+
+STACK = 1000
+
+
+def _pokerbot_table(table: int, seats: int = 4, runner=None) -> PokerGame:
+    players = [PokerBot(f"Bot {table}.{seat}", STACK, verbose=False) for seat in range(seats)]
+    return PokerGame(players, big_blind=20, sink=NullSink(), seed=table, runner=runner)
+
+
+def test_pokerbot_tables_on_threads():
+    games = [_pokerbot_table(table) for table in range(4)]
+    decisions = play_tables(games, 60, starting_stack=STACK)
+    assert all(decisions)
+    for game in games:
+        assert sum(player.stack for player in game.players) == STACK * len(game.players)
+
+
+def test_pokerbots_under_thread_runner():
+    players = [PokerBot(f"Bot {seat}", STACK, verbose=False) for seat in range(4)]
+    with ThreadRunner(timeout=None) as runner:
+        result = simulate(players, 60, starting_stack=STACK, runner=runner)
+    assert result.hands == 60
+    assert sum(result.stacks.values()) == STACK * len(players)
+
+
+def test_shared_estimator_on_threads():
+    # Heads-up river spots, where the exact equity is known
+    rng = random.Random(5)
+    spots = [rng.sample(range(1, 53), 7) for _ in range(64)]
+    estimator = EquityEstimator(max_samples=4000, time_budget=None, target_error=0.0)
+
+    def estimate(cards):
+        return estimator.estimate(cards[:2], cards[2:]).equity
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        estimates = list(executor.map(estimate, spots))
+    for cards, estimated in zip(spots, estimates):
+        assert abs(estimated - exact_equity(cards[:2], cards[2:]).equity) < 0.05
@@ -0,0 +1,173 @@
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+from events import NullSink
+from game import PokerGame
+from player import Player
+from registry import bot_label, load_bot
+from simulation import play_hand
+
+# A bot entry is a seat name plus a picklable factory called as factory(name, stack),
+# e.g. ("Alice", functools.partial(PokerBot, verbose=False)).
+BotEntry = Tuple[str, Callable[[str, int], Player]]
+
+# Hands of action history each worker table keeps for its bots
+BLOCK_HISTORY_HANDS = 100
+
+
+@dataclass
+class BotStats:
+    name: str
+    hands: int = 0
+    hands_won: int = 0
+    chips_won: int = 0  # net chips over all hands
+    chips_squared: int = 0  # sum of squared per-hand results, for the variance
+
+    def record(self, result: int):
+        self.hands += 1
+        self.chips_won += result
+        self.chips_squared += result * result
+        if result > 0:
+            self.hands_won += 1
+
+    def merge(self, other: "BotStats"):
+        self.hands += other.hands
+        self.hands_won += other.hands_won
+        self.chips_won += other.chips_won
+        self.chips_squared += other.chips_squared
+
+    @property
+    def win_rate(self) -> float:
+        return self.hands_won / self.hands if self.hands else 0.0
+
+    @property
+    def chips_per_hand(self) -> float:
+        return self.chips_won / self.hands if self.hands else 0.0
+
+    @property
+    def std_error(self) -> float:
+        """Standard error of chips_per_hand."""
+        if self.hands < 2:
+            return float("inf")
+        variance = (self.chips_squared - self.hands * self.chips_per_hand ** 2) / (self.hands - 1)
+        return math.sqrt(max(variance, 0.0) / self.hands)
+
+
+@dataclass
+class TournamentResult:
+    hands: int
+    blocks: int
+    seconds: float
+    big_blind: int
+    stats: Dict[str, BotStats]
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.seconds if self.seconds > 0 else float("inf")
+
+    def bb_per_100(self, name: str) -> float:
+        return self.stats[name].chips_per_hand / self.big_blind * 100
+
+    def summary(self) -> str:
+        lines = [f"{self.hands} hands in {self.blocks} blocks, {self.seconds:.2f}s "
+                 f"({self.hands_per_second:.0f} hands/sec)"]
+        for name, stats in self.stats.items():
+            error = stats.std_error / self.big_blind * 100
+            lines.append(f"{name:>16}: {self.bb_per_100(name):+8.2f} ± {1.96 * error:.2f} bb/100, "
+                         f"net {stats.chips_won:+d}, won {stats.win_rate:.1%} of hands")
+        return "\n".join(lines)
+
+
+def block_seeds(seed: int, num_blocks: int) -> List[int]:
+    """Derives one independent seed per block from the master seed."""
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for _ in range(num_blocks)]
+
+
+def play_block_results(bots: List[BotEntry], seed: int, num_hands: int, big_blind: int,
+                       stack: int) -> Dict[str, List[int]]:
+    """
+    Plays num_hands hands at a fresh table, resetting every stack before each hand.
+    Returns every bot's net chips per hand. Runs inside the worker processes,
+    which own their game and player instances.
+    """
+    # The deck gets its own stream, the global generator is seeded for bots that use it
+    random.seed(seed)
+    players = [factory(name, stack) for name, factory in bots]
+    game = PokerGame(players, big_blind=big_blind, sink=NullSink(), seed=seed, history_hands=BLOCK_HISTORY_HANDS)
+    results = {name: [] for name, _ in bots}
+    for _ in range(num_hands):
+        for player in players:
+            player.stack = stack
+        play_hand(game)
+        for player in players:
+            results[player.name].append(player.stack - stack)
+    return results
+
+
+def play_block(bots: List[BotEntry], seed: int, num_hands: int, big_blind: int, stack: int) -> Dict[str, BotStats]:
+    """Plays a block as play_block_results does, and returns every bot's totals."""
+    stats = {name: BotStats(name) for name, _ in bots}
+    for name, results in play_block_results(bots, seed, num_hands, big_blind, stack).items():
+        for result in results:
+            stats[name].record(result)
+    return stats
+
+
+def run_tournament(bots: List[BotEntry], num_hands: int, hands_per_block: int = 1000, workers: Optional[int] = None,
+                   seed: int = 0, big_blind: int = 20, stack: int = 1000) -> TournamentResult:
+    """
+    Splits num_hands into seeded blocks and plays them across a process pool.
+
+    The result only depends on the master seed and the block size, not on the
+    number of workers. With workers=1 the blocks are played in this process.
+    """
+    names = [name for name, _ in bots]
+    if len(set(names)) != len(names):
+        raise ValueError("Bot names must be unique")
+
+    block_sizes = [hands_per_block] * (num_hands // hands_per_block)
+    if num_hands % hands_per_block:
+        block_sizes.append(num_hands % hands_per_block)
+    seeds = block_seeds(seed, len(block_sizes))
+    play = partial(play_block, bots, big_blind=big_blind, stack=stack)
+
+    start = time.perf_counter()
+    if workers == 1:
+        block_results = list(map(play, seeds, block_sizes))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            block_results = list(executor.map(play, seeds, block_sizes))
+    seconds = time.perf_counter() - start
+
+    stats = {name: BotStats(name) for name in names}
+    for block in block_results:
+        for name, block_stats in block.items():
+            stats[name].merge(block_stats)
+    return TournamentResult(num_hands, len(block_sizes), seconds, big_blind, stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play bots against each other across several processes.")
+    parser.add_argument("bots", nargs="+", help="bots to seat, as a registered name or module:Class")
+    parser.add_argument("--hands", type=int, default=10000)
+    parser.add_argument("--block", type=int, default=1000, help="hands per worker task")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stack", type=int, default=1000)
+    parser.add_argument("--big-blind", type=int, default=20)
+    args = parser.parse_args()
+
+    bots = [(f"{bot_label(spec)} {i + 1}", load_bot(spec)) for i, spec in enumerate(args.bots)]
+    result = run_tournament(bots, args.hands, hands_per_block=args.block, workers=args.workers,
+                            seed=args.seed, big_blind=args.big_blind, stack=args.stack)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
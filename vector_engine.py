@@ -0,0 +1,380 @@
+"""
+Lockstep engine for large-scale self-play: the state of K tables lives in
+NumPy arrays and every table moves one step at a time, with the bots deciding
+for all tables at once and the showdowns evaluated in one batch.
+
+The rules are those of PokerGame.player_action, advance_game_phase and
+_showdown, quirks included, and VectorEngine.play_hand drives the tables the way
+simulation.play_hand drives a game. The engine never prints and keeps no action
+history.
+
+    python vector_engine.py --tables 10000 --hands 10
+"""
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+import numpy as np
+from batch_evaluator import evaluate_batch
+from game import GamePhase
+from player import PlayerAction, PlayerStatus
+from simulation import MAX_INVALID_ACTIONS
+
+# Codes used in the state arrays: positions in the enums
+ACTIVE, FOLDED, ALL_IN, OUT = (list(PlayerStatus).index(status) for status in
+                               (PlayerStatus.ACTIVE, PlayerStatus.FOLDED, PlayerStatus.ALL_IN, PlayerStatus.OUT))
+FOLD, CHECK, CALL, BET, RAISE, ALL_IN_ACTION = (list(PlayerAction).index(action) for action in
+                                                (PlayerAction.FOLD, PlayerAction.CHECK, PlayerAction.CALL,
+                                                 PlayerAction.BET, PlayerAction.RAISE, PlayerAction.ALL_IN))
+SETUP, PRE_FLOP, FLOP, TURN, RIVER, SHOWDOWN = (list(GamePhase).index(phase) for phase in GamePhase)
+
+# A policy decides for the tables given (an array of table numbers) whose turn it
+# is, returning arrays of action codes and amounts. policies[seat] is asked for
+# the tables where that seat is to act.
+Policy = Callable[["VectorEngine", np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+class VectorEngine:
+    """
+    K tables of num_players seats. State arrays are indexed by table first:
+
+        stacks, bets      (K, num_players) int64
+        status            (K, num_players) int8, PlayerStatus codes
+        has_played        (K, num_players) bool
+        hole              (K, num_players, 2) int8 card indices, 0 when not dealt
+        board             (K, 5) int8, num_board (K,) cards dealt so far
+        deck              (K, 52) int8, the deal order of the hand, dealt (K,) cards used
+        pot, current_bet, phase, button, active, hand_number  (K,)
+    """
+
+    def __init__(self, num_tables: int, num_players: int, big_blind: int = 20, starting_stack: int = 1000,
+                 seed: Optional[int] = None):
+        k, n = num_tables, num_players
+        self.num_tables = k
+        self.num_players = n
+        self.big_blind = big_blind
+        self.rng = np.random.default_rng(seed)
+
+        self.stacks = np.full((k, n), starting_stack, dtype=np.int64)
+        self.bets = np.zeros((k, n), dtype=np.int64)
+        self.status = np.full((k, n), ACTIVE, dtype=np.int8)
+        self.has_played = np.zeros((k, n), dtype=bool)
+        self.hole = np.zeros((k, n, 2), dtype=np.int8)
+        self.board = np.zeros((k, 5), dtype=np.int8)
+        self.num_board = np.zeros(k, dtype=np.int64)
+        self.deck = np.tile(np.arange(1, 53, dtype=np.int8), (k, 1))
+        self.dealt = np.zeros(k, dtype=np.int64)
+        self.pot = np.zeros(k, dtype=np.int64)
+        self.current_bet = np.zeros(k, dtype=np.int64)
+        self.phase = np.full(k, SETUP, dtype=np.int8)
+        self.button = np.zeros(k, dtype=np.int64)
+        self.active = np.zeros(k, dtype=np.int64)
+        self.hand_number = np.zeros(k, dtype=np.int64)
+        # Invalid decisions in a row of the player to act, as counted by simulation.play_hand
+        self.tries = np.zeros(k, dtype=np.int64)
+        # Hands cut short by play_hand's step limit, and pots left without a contender
+        self.stalled = 0
+
+    def start_hands(self, decks: Optional[np.ndarray] = None):
+        """
+        Starts a new hand at every table, as PokerGame.start_new_hand. decks, a
+        (K, 52) array of deal orders, replaces the shuffle.
+        """
+        n = self.num_players
+        rows = np.arange(self.num_tables)
+        self.hand_number += 1
+        if decks is None:
+            self.deck = self.rng.permuted(np.tile(np.arange(1, 53, dtype=np.int8), (self.num_tables, 1)), axis=1)
+        else:
+            self.deck = np.asarray(decks, dtype=np.int8).copy()
+        self.board[:] = 0
+        self.num_board[:] = 0
+        self.pot[:] = 0
+        self.current_bet[:] = 0
+        self.phase[:] = SETUP
+        self.tries[:] = 0
+        self.bets[:] = 0
+        self.status[:] = np.where(self.stacks > 0, ACTIVE, OUT)
+        self.has_played[:] = self.status != ACTIVE
+        self.button = (self.button + 1) % n
+
+        # Hole cards go to every seat that is not out, in seat order
+        dealt_to = self.status != OUT
+        first = 2 * (np.cumsum(dealt_to, axis=1) - dealt_to)
+        self.hole[:, :, 0] = np.where(dealt_to, self.deck[rows[:, None], first], 0)
+        self.hole[:, :, 1] = np.where(dealt_to, self.deck[rows[:, None], np.minimum(first + 1, 51)], 0)
+        self.dealt = 2 * dealt_to.sum(axis=1)
+
+        # Big blind only, posted as a BET of big_blind
+        bb = (self.button + 1) % n
+        paying = self.stacks[rows, bb] > 0
+        t, seat = rows[paying], bb[paying]
+        amount = np.minimum(self.big_blind, self.stacks[t, seat])
+        self.stacks[t, seat] -= amount
+        self.bets[t, seat] += amount
+        self.status[t, seat] = np.where(self.stacks[t, seat] == 0, ALL_IN, self.status[t, seat])
+        self.pot[t] += amount
+        self.current_bet[t] = self.big_blind
+
+        self.phase[:] = PRE_FLOP
+        self.active = (self.button + 2) % n
+        self._adjust_active(rows)
+
+    def _adjust_active(self, t: np.ndarray):
+        """Moves the turn of tables t to the first ACTIVE seat from the current one on, if there is one."""
+        if not len(t):
+            return
+        seats = (self.active[t, None] + np.arange(self.num_players)) % self.num_players
+        can_act = self.status[t[:, None], seats] == ACTIVE
+        first = can_act.argmax(axis=1)
+        found = can_act[np.arange(len(t)), first]
+        self.active[t] = np.where(found, seats[np.arange(len(t)), first], self.active[t])
+
+    def _deal_board(self, t: np.ndarray, count: int):
+        if not len(t):
+            return
+        offsets = np.arange(count)
+        self.board[t[:, None], self.num_board[t, None] + offsets] = self.deck[t[:, None], self.dealt[t, None] + offsets]
+        self.num_board[t] += count
+        self.dealt[t] += count
+
+    def step(self, t: np.ndarray, actions, amounts) -> np.ndarray:
+        """
+        Applies one action per table to the player to act at tables t, with the
+        validation and effects of PokerGame.player_action. Returns a bool array,
+        False where the action was rejected and nothing changed.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=np.int64)
+        seat = self.active[t]
+        stack = self.stacks[t, seat]
+        bet = self.bets[t, seat]
+        current_bet = self.current_bet[t]
+
+        amount = np.where(actions == CALL, current_bet - bet, np.minimum(amounts, stack))
+        betting = (actions == BET) | (actions == RAISE)
+        raising = current_bet > 0
+        action = np.where(betting, np.where(raising, RAISE, BET), actions)
+        min_amount = np.where(raising, current_bet, self.big_blind)
+        valid = ~(((actions == CHECK) & (current_bet > bet)) | (betting & (amount <= min_amount))
+                  | ((actions == ALL_IN_ACTION) & (amount <= 0)))
+
+        t, seat, stack, bet, current_bet = t[valid], seat[valid], stack[valid], bet[valid], current_bet[valid]
+        amount, action, betting = amount[valid], action[valid], betting[valid]
+        calling = action == CALL
+        all_in = action == ALL_IN_ACTION
+
+        new_current_bet = np.where(betting, amount, current_bet)
+        new_current_bet = np.where(all_in & (amount > current_bet), bet, new_current_bet)
+
+        # Player.take_action
+        call_amount = np.minimum(amount, stack)
+        bet_delta = np.minimum(amount, stack) - bet
+        bet_amount = np.where(action == RAISE, np.minimum(amount - bet, stack), np.minimum(amount, stack))
+        bet_put = np.where(bet_amount == stack, bet_amount, bet_delta)
+        put = np.select([calling, betting, all_in], [call_amount, bet_put, stack], 0)
+        new_stack = stack - put
+        put_in = np.select([calling, betting & (new_stack == 0), betting, all_in],
+                           [call_amount, bet_amount, bet_delta, stack], 0)
+        status = self.status[t, seat]
+        status = np.where(action == FOLD, FOLDED, status)
+        status = np.where((calling | betting | all_in) & (new_stack == 0) & (action != FOLD), ALL_IN, status)
+
+        self.stacks[t, seat] = new_stack
+        self.bets[t, seat] = bet + put
+        self.status[t, seat] = status
+        self.current_bet[t] = new_current_bet
+        self.pot[t] += put_in
+        self.has_played[t, seat] = True
+        self.active[t] = (seat + 1) % self.num_players
+
+        statuses = self.status[t]
+        counted = (statuses == ACTIVE) | (statuses == OUT)
+        complete = ((~counted | (self.bets[t] == self.current_bet[t, None])).all(axis=1)
+                    & self.has_played[t].all(axis=1))
+        self.advance(t[complete])
+        self._adjust_active(t[~complete])
+        return valid
+
+    def advance(self, t: np.ndarray):
+        """PokerGame.advance_game_phase for tables t."""
+        if not len(t):
+            return
+        statuses = self.status[t]
+        contenders = ((statuses == ACTIVE) | (statuses == ALL_IN)).sum(axis=1)
+        direct = contenders == 1
+        self.phase[t[direct]] = SHOWDOWN
+        self._showdown(t[direct])
+        t, statuses = t[~direct], statuses[~direct]
+
+        no_one_active = ((statuses == ALL_IN) | (statuses == FOLDED)).all(axis=1)
+        run_out = t[no_one_active]
+        while len(run_out):
+            run_out = run_out[self.num_board[run_out] < 5]
+            self._deal_board(run_out, 1)
+        self.phase[t[no_one_active]] = SHOWDOWN
+        self._showdown(t[no_one_active])
+        t = t[~no_one_active]
+
+        self.bets[t] = 0
+        self.current_bet[t] = 0
+        phase = self.phase[t]
+        river = t[phase == RIVER]
+        self.phase[river] = SHOWDOWN
+        self._showdown(river)
+        for current, following, count in ((PRE_FLOP, FLOP, 3), (FLOP, TURN, 1), (TURN, RIVER, 1)):
+            moving = t[phase == current]
+            self.phase[moving] = following
+            self._deal_board(moving, count)
+
+        t = t[phase != RIVER]
+        self.active[t] = (self.button[t] + 1) % self.num_players
+        self._adjust_active(t)
+        self.has_played[t] = self.status[t] != ACTIVE
+
+    def _showdown(self, t: np.ndarray):
+        if not len(t):
+            return
+        statuses = self.status[t]
+        contending = (statuses == ACTIVE) | (statuses == ALL_IN)
+        contenders = contending.sum(axis=1)
+
+        single = t[contenders == 1]
+        self.stacks[single, contending[contenders == 1].argmax(axis=1)] += self.pot[single]
+        # PokerGame fails on a showdown nobody contends; here the pot is simply not paid out
+        self.stalled += int((contenders == 0).sum())
+
+        several = contenders >= 2
+        t, contending = t[several], contending[several]
+        if not len(t):
+            return
+        m, n = len(t), self.num_players
+        cards = np.concatenate([self.hole[t], np.broadcast_to(self.board[t, None, :], (m, n, 5))], axis=2)
+        strengths, _ = evaluate_batch(cards.reshape(m * n, 7))
+        strengths = np.where(contending, strengths.reshape(m, n), -1)
+        winners = strengths == strengths.max(axis=1, keepdims=True)
+        num_winners = winners.sum(axis=1)
+        pot = self.pot[t]
+        # Winners split the pot evenly, the first ones in seat order get a chip of the remainder each
+        order = np.cumsum(winners, axis=1) - 1
+        payout = np.where(winners, (pot // num_winners)[:, None] + (order < (pot % num_winners)[:, None]), 0)
+        self.stacks[t] += payout
+
+    def play_hand(self, policies: Sequence[Policy], decks: Optional[np.ndarray] = None,
+                  max_steps: int = 10_000) -> int:
+        """
+        Plays one hand at every table, asking policies[seat] for the decisions
+        of that seat, with the flow of simulation.play_hand: a player is folded
+        after MAX_INVALID_ACTIONS invalid decisions in a row, and the game moves
+        on when the only active player has matched the bet. Tables still playing
+        after max_steps are stopped where they are. Returns the number of decisions.
+        """
+        self.start_hands(decks)
+        decisions = 0
+        for _ in range(max_steps):
+            live = np.flatnonzero(self.phase != SHOWDOWN)
+            if not len(live):
+                return decisions
+
+            forced = self.tries[live] >= MAX_INVALID_ACTIONS
+            self.step(live[forced], np.full(forced.sum(), FOLD), np.zeros(forced.sum(), dtype=np.int64))
+            self.tries[live[forced]] = 0
+            live = live[~forced]
+
+            seat = self.active[live]
+            alone = (self.status[live] == ACTIVE).sum(axis=1) == 1
+            matched = self.bets[live, seat] == self.current_bet[live]
+            self.advance(live[alone & matched])
+            live, seat = live[~(alone & matched)], seat[~(alone & matched)]
+
+            for s in range(self.num_players):
+                tables = live[seat == s]
+                if not len(tables):
+                    continue
+                actions, amounts = policies[s](self, tables)
+                valid = self.step(tables, actions, amounts)
+                self.tries[tables] = np.where(valid, 0, self.tries[tables] + 1)
+                decisions += len(tables)
+
+        live = np.flatnonzero(self.phase != SHOWDOWN)
+        self.stalled += len(live)
+        self.phase[live] = SHOWDOWN
+        return decisions
+
+    def play(self, policies: Sequence[Policy], num_hands: int,
+             starting_stack: Optional[int] = None) -> "VectorResult":
+        """Plays num_hands hands at every table, resetting the stacks before each hand if starting_stack is set."""
+        decisions = 0
+        start = time.perf_counter()
+        for _ in range(num_hands):
+            if starting_stack is not None:
+                self.stacks[:] = starting_stack
+            decisions += self.play_hand(policies)
+        return VectorResult(num_hands * self.num_tables, decisions, time.perf_counter() - start)
+
+
+@dataclass
+class VectorResult:
+    hands: int
+    decisions: int
+    seconds: float
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.seconds if self.seconds > 0 else float("inf")
+
+
+def call_policy(engine: VectorEngine, tables: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Checks or calls everything."""
+    return np.full(len(tables), CALL), engine.current_bet[tables]
+
+
+class RandomPolicy:
+    """
+    Folds, calls, raises (to twice the current bet or two big blinds) or goes
+    all in at random with the given weights. Folding is replaced by a check when
+    there is nothing to call.
+    """
+
+    def __init__(self, fold: float = 0.2, call: float = 0.55, raise_: float = 0.2, all_in: float = 0.05,
+                 seed: Optional[int] = None):
+        weights = np.array([fold, call, raise_, all_in], dtype=float)
+        self.cumulative = np.cumsum(weights / weights.sum())
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, engine: VectorEngine, tables: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        choice = np.searchsorted(self.cumulative, self.rng.random(len(tables)), side="right")
+        choice = np.minimum(choice, 3)
+        seat = engine.active[tables]
+        current_bet = engine.current_bet[tables]
+        nothing_to_call = current_bet <= engine.bets[tables, seat]
+        fold = np.where(nothing_to_call, CHECK, FOLD)
+        actions = np.choose(choice, [fold, np.full(len(tables), CALL), np.full(len(tables), RAISE),
+                                     np.full(len(tables), ALL_IN_ACTION)])
+        raise_to = np.maximum(2 * current_bet, 2 * engine.big_blind)
+        amounts = np.choose(choice, [np.zeros(len(tables), dtype=np.int64), current_bet, raise_to,
+                                     engine.stacks[tables, seat]])
+        return actions, amounts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=10_000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--hands", type=int, default=10)
+    parser.add_argument("--stack", type=int, default=1000)
+    parser.add_argument("--big-blind", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = VectorEngine(args.tables, args.players, args.big_blind, args.stack, seed=args.seed)
+    policies: List[Policy] = [RandomPolicy(seed=args.seed * 1000 + seat) for seat in range(args.players)]
+    result = engine.play(policies, args.hands, starting_stack=args.stack)
+    print(f"{result.hands} hands, {result.decisions} decisions in {result.seconds:.2f}s")
+    print(f"{result.hands_per_second:,.0f} hands/sec")
+    if engine.stalled:
+        print(f"{engine.stalled} hands stalled")
+
+
+if __name__ == "__main__":
+    main()